@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Compile full_table_en.json + full_table.json into item_catalog.bin
+# Usage: python build_catalog.py [--bench]
+
+import gc
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from furtorch_v5 import CATALOG_BIN, TrackerEngine, compile_item_catalog, default_settings, load_item_database
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+print("FurTorch v5 - Catalog Build")
+print("-" * 40)
+
+for file in ("full_table_en.json", "full_table.json"):
+    if not os.path.exists(file):
+        print(f"❌ {file} not found!")
+        sys.exit(1)
+
+compile_item_catalog("full_table_en.json", "full_table.json", CATALOG_BIN)
+size_kb = os.path.getsize(CATALOG_BIN) / 1024
+json_kb = (os.path.getsize("full_table_en.json") + os.path.getsize("full_table.json")) / 1024
+print(f"✓ {CATALOG_BIN}: {size_kb:.1f} KB (JSON tables: {json_kb:.1f} KB)")
+
+if "--bench" not in sys.argv:
+    sys.exit(0)
+
+
+# ==================== BENCHMARK ====================
+
+RUNS = 50
+
+# The app's real startup path: load the catalog, then build the engine
+# (search index, alert table...) on top of it
+SETTINGS = dict(default_settings(), price_feed="")
+
+# Fresh interpreter per loader so resident memory isn't shared between them
+RSS_PROBE = """
+import psutil
+from furtorch_v5 import TrackerEngine, load_item_database
+rss = psutil.Process().memory_info().rss
+engine = TrackerEngine({settings!r}, load_item_database(bin_path={bin_path!r}))
+print(psutil.Process().memory_info().rss - rss)
+"""
+
+
+def start_engine(bin_path):
+    return TrackerEngine(SETTINGS, load_item_database(bin_path=bin_path))
+
+
+def bench(label, bin_path):
+    logging.getLogger("furtorch").setLevel(logging.WARNING)  # quiet "Loaded N items"
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        start_engine(bin_path)
+    load_ms = (time.perf_counter() - start) / RUNS * 1000
+
+    tracemalloc.start()
+    engine = start_engine(bin_path)
+    heap_kb = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+    db = engine.item_db
+
+    start = time.perf_counter()
+    for item_id in ("1001", "100300", "5028", "990091"):
+        for _ in range(10000):
+            db[item_id]['price']
+    lookup_us = (time.perf_counter() - start) / 40000 * 1e6
+
+    try:
+        out = subprocess.run([sys.executable, "-c", RSS_PROBE.format(settings=SETTINGS, bin_path=bin_path)],
+                             capture_output=True, text=True, check=True).stdout
+        rss = f"{int(out) / 1024:.0f} KB"
+    except Exception:
+        rss = "n/a (needs psutil)"
+
+    print(f"  {label:<8} startup {load_ms:7.3f} ms   heap {heap_kb:7.1f} KB   "
+          f"RSS +{rss:<10}   lookup {lookup_us:.2f} us")
+
+
+print(f"\nBenchmark (engine startup, {RUNS} runs each):")
+bench("JSON", None)
+bench("Binary", CATALOG_BIN)
@@ -17,7 +17,9 @@ print()
 print("[1/6] Checking required files...")
 required = {
     "furtorch_v5.py": "Main application",
-    "full_table_en.json": "Item database"
+    "full_table_en.json": "Item database",
+    "full_table.json": "Chinese item names (search)",
+    "build_catalog.py": "Catalog compiler"
 }
 
 missing = []
@@ -37,7 +39,16 @@ if missing:
     input("\nPress Enter to exit...")
     sys.exit(1)
 
-print("✓ All files present\n")
+print("✓ All files present")
+
+# Compile the binary item catalog (loaded with mmap at startup)
+try:
+    subprocess.check_call([sys.executable, "build_catalog.py"], stdout=subprocess.DEVNULL)
+    print("  ✓ item_catalog.bin compiled")
+except Exception as e:
+    print(f"  ⚠ Could not compile item_catalog.bin ({e}) - app will use JSON")
+
+print()
 
 # Step 2: Install dependencies
 print("[2/6] Installing dependencies...")
@@ -81,6 +92,8 @@ build_cmd = [
     "--windowed",
     "--name=FEInfinite",
     "--add-data=full_table_en.json;.",
+    "--add-data=full_table.json;.",
+    "--add-data=item_catalog.bin;.",
     "--hidden-import=win32gui",
     "--hidden-import=win32process",
     "--hidden-import=win32api",
@@ -125,6 +138,9 @@ print(f"  ✓ FEInfinite.exe ({exe_size:.1f} MB)")
 
 # Copy data files
 shutil.copy2("full_table_en.json", portable_dir)
+shutil.copy2("full_table.json", portable_dir)  # Chinese names for search
+if os.path.exists("item_catalog.bin"):
+    shutil.copy2("item_catalog.bin", portable_dir)  # Compiled catalog (fast startup)
 print("  ✓ Data files copied")
 
 # Create README
@@ -266,6 +282,8 @@ print()
 print("Contents:")
 print("  • FEInfinite.exe       - Main application")
 print("  • full_table_en.json   - Item database")
+print("  • full_table.json      - Chinese item names (search)")
+print("  • item_catalog.bin     - Compiled item catalog")
 print("  • README.txt           - User guide")
 print("  • Start.bat            - Quick launcher")
 print("  • Start_Debug.bat      - Debug mode launcher")
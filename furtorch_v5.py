@@ -3,12 +3,33 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import tkinter.font as tkfont
 import json
 import time
 import re
 import os
 from datetime import datetime
 import threading
+import asyncio
+import base64
+import hashlib
+import gzip
+import http.client
+import io
+import logging
+import logging.handlers
+import queue
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from collections import deque, namedtuple
+from collections.abc import MutableMapping
+from urllib.parse import parse_qs, urlsplit
+
+log = logging.getLogger("furtorch")
+# Per-event diagnostics ([DROP], [CONSUMED], unknown items...) - off by default
+events_log = logging.getLogger("furtorch.events")
 
 try:
     import win32gui
@@ -17,7 +38,98 @@ try:
     HAS_WIN_SUPPORT = True
 except ImportError:
     HAS_WIN_SUPPORT = False
-    print("⚠ Windows modules not available")
+    log.warning("⚠ Windows modules not available")
+
+try:
+    import winsound  # high-value drop alert sound; elsewhere the Tk bell
+except ImportError:
+    winsound = None
+
+try:
+    import zstandard  # optional: replaying .zst archived logs
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# ==================== LOGGING ====================
+
+LOG_LEVELS = ("OFF", "ERROR", "WARNING", "INFO", "DEBUG")
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    De-duplicates repeated messages (e.g. the same unknown item ID over and
+    over): the first copy passes, copies within `interval` seconds are
+    counted and dropped, and the next one after that says how many were
+    suppressed. Keeps at most `max_keys` distinct messages.
+    """
+
+    def __init__(self, interval=60.0, max_keys=1024):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen = {}  # message -> [last emitted time, suppressed count]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.getMessage())
+        now = record.created
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None:
+                if len(self._seen) >= self.max_keys:
+                    self._seen.pop(next(iter(self._seen)))
+                self._seen[key] = [now, 0]
+                return True
+            if now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            if entry[1]:
+                record.msg = f"{record.getMessage()} (repeated {entry[1]}x)"
+                record.args = None
+            entry[0], entry[1] = now, 0
+            return True
+
+
+_log_listener = None
+
+
+def setup_logging(settings=None):
+    """
+    Route all furtorch logging through a queue: callers (the log I/O thread,
+    the Tk thread) only enqueue, and a listener thread does the slow console
+    write. Safe to call again; it just re-applies the levels.
+    """
+    global _log_listener
+    if _log_listener is None:
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+        log.addHandler(queue_handler)
+        log.propagate = False
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("%(asctime)s %(message)s", "%H:%M:%S"))
+        _log_listener = logging.handlers.QueueListener(log_queue, console)
+        _log_listener.start()
+    set_log_levels(settings or {})
+
+
+def set_log_levels(settings):
+    """Apply settings['log_level'] / settings['event_log_level'] at runtime"""
+    def level(name, default):
+        name = str(settings.get(name, default)).upper()
+        return logging.CRITICAL + 1 if name == "OFF" else getattr(logging, name, logging.INFO)
+    log.setLevel(level('log_level', "INFO"))
+    events_log.setLevel(level('event_log_level', "OFF"))
+
+
+def stop_logging():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()  # flushes whatever is still queued
+        _log_listener = None
+
 
 # ==================== ORIGINAL PARSER ====================
 
@@ -73,134 +185,3488 @@ def convert_from_log_structure(log_text):
                     if current_node is None:
                         break
 
-            stack.append(current_node)
-        else:
-            key_part = content.strip()
-            keys = [k.strip() for k in key_part.split('+') if k.strip()]
-            current_node = parent
+            stack.append(current_node)
+        else:
+            key_part = content.strip()
+            keys = [k.strip() for k in key_part.split('+') if k.strip()]
+            current_node = parent
+
+            for key in keys:
+                if not key or current_node is None:
+                    continue
+                if not isinstance(current_node, dict):
+                    break
+                if key not in current_node:
+                    current_node[key] = {}
+                current_node = current_node[key]
+                if current_node is None:
+                    break
+
+            stack.append(current_node)
+
+    return root
+
+
+
+def scan_log_for_pickups(log_text):
+    """
+    DEPRECATED: This function is NOT used in the actual log monitoring.
+    The real parsing happens in parse_log_text() method which correctly
+    calculates deltas from the session's bag inventory.
+    
+    This function is kept for backwards compatibility but should not be called.
+    """
+    log.warning("⚠ WARNING: scan_log_for_pickups() called but is deprecated!")
+    return []
+
+
+
+def parse_pickup_events(log_text):
+    """
+    Parse pickup events from new log format.
+    Returns list of (item_id, count) tuples.
+    """
+    return scan_log_for_pickups(log_text)
+
+
+# ==================== LOG DISCOVERY ====================
+
+GAME_WINDOW_TITLE = "Torchlight: Infinite  "
+
+
+def locate_game_log():
+    """
+    Find UE_game.log from the running game window.
+    Returns (log_path, message) - log_path is None when not found.
+    """
+    if not HAS_WIN_SUPPORT:
+        return None, "⚠ Windows support not available"
+
+    hwnd = win32gui.FindWindow(None, GAME_WINDOW_TITLE)
+    if not hwnd:
+        return None, "⚠ Game not detected. Start game first!"
+
+    tid, pid = win32process.GetWindowThreadProcessId(hwnd)
+    game_exe = psutil.Process(pid).exe()
+    log.info("Game exe: %s", game_exe)
+    game_dir = os.path.dirname(game_exe)
+
+    # Try correct path with UE_game, then the fallback path
+    candidates = [
+        os.path.join(game_dir, "../../UE_game/TorchLight/Saved/Logs/UE_game.log"),
+        os.path.join(game_dir, "../../TorchLight/Saved/Logs/UE_game.log"),
+    ]
+    for method, candidate in enumerate(candidates, 1):
+        candidate = os.path.normpath(candidate)
+        if os.path.exists(candidate):
+            log.info("✓ Found log (Method %d): %s", method, candidate)
+            return candidate, None
+
+    log.warning("❌ Log not found")
+    return None, "⚠ Log file not found! Enable logging!"
+
+
+class LogDiscovery:
+    """
+    Keeps track of where the game log lives while the tracker runs.
+
+    The last known path is cached and revalidated with one os.stat() per
+    poll. Window/process enumeration only happens when that fails, with
+    exponential backoff so a closed game costs almost nothing.
+
+    Modes:
+    - "auto": cached path first, then locate_game_log() (Windows)
+    - "path": only ever use the configured path (works on any OS)
+
+    poll() returns one of:
+    - None        nothing changed
+    - "attached"  log found (first time, or after it went missing)
+    - "recreated" same path but a new file (game restarted / truncated)
+    - "lost"      the log disappeared
+    """
+
+    MIN_BACKOFF = 1.0
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, mode="auto", log_path=""):
+        self.mode = mode
+        self.log_path = log_path or ""
+        self.attached = False
+        self.message = None
+        self._identity = None
+        self.size = 0
+        self._backoff = self.MIN_BACKOFF
+        self._next_search = 0.0
+
+    def poll(self, now=None):
+        now = time.time() if now is None else now
+
+        st = self._stat(self.log_path)
+        if st is None and self.mode == "auto" and now >= self._next_search:
+            st = self._search(now)
+
+        if st is None:
+            if self.attached:
+                self.attached = False
+                self._identity = None
+                return "lost"
+            return None
+
+        identity = (st.st_dev, st.st_ino)
+        event = None
+        if not self.attached:
+            event = "attached"
+        elif identity != self._identity or st.st_size < self.size:
+            event = "recreated"
+
+        self.attached = True
+        self._identity = identity
+        self.size = st.st_size
+        self._backoff = self.MIN_BACKOFF
+        self.message = None
+        return event
+
+    def _search(self, now):
+        try:
+            path, self.message = locate_game_log()
+        except Exception as e:
+            path, self.message = None, f"⚠ Error: {str(e)[:40]}"
+            log.error("❌ Error: %s", e)
+
+        st = self._stat(path)
+        if st is None:
+            self._next_search = now + self._backoff
+            self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+            return None
+
+        self.log_path = path
+        return st
+
+    @staticmethod
+    def _stat(path):
+        if not path:
+            return None
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+
+# ==================== ROLLING METRICS ====================
+
+ROLLING_WINDOWS = (1, 5, 15, 60)  # minutes
+ROLLING_MIN_FILL = 0.25  # a window reports no rate until this share of it has been seen
+
+
+class RollingWindow:
+    """
+    Sum of values over the last `span` seconds, kept in a ring of
+    fixed-width time buckets. add() and rate() are O(1) with fixed memory.
+    """
+
+    def __init__(self, span, buckets=60):
+        self.span = span
+        self.width = span / buckets
+        self.values = array('d', bytes(8 * buckets))
+        self.counts = array('d', bytes(8 * buckets))
+        self.value_sum = 0.0
+        self.count_sum = 0.0
+        self.head = None  # absolute index of the newest bucket
+
+    def _advance(self, now):
+        bucket = int(now // self.width)
+        if self.head is None:
+            self.head = bucket
+            return
+        n = len(self.values)
+        # Clear the buckets that fell out of the window (at most the whole ring)
+        for b in range(self.head + 1, min(bucket, self.head + n) + 1):
+            i = b % n
+            self.value_sum -= self.values[i]
+            self.count_sum -= self.counts[i]
+            self.values[i] = 0.0
+            self.counts[i] = 0.0
+        if bucket > self.head:
+            self.head = bucket
+
+    def add(self, now, value, count):
+        self._advance(now)
+        i = self.head % len(self.values)
+        self.values[i] += value
+        self.counts[i] += count
+        self.value_sum += value
+        self.count_sum += count
+
+    def totals(self, now):
+        self._advance(now)
+        return self.value_sum, self.count_sum
+
+
+class RollingMetrics:
+    """
+    Rolling profit-per-minute and drops-per-minute over ROLLING_WINDOWS.
+    Profit is drop value minus consumed value.
+    """
+
+    def __init__(self, now=None):
+        self.started = time.time() if now is None else now
+        self.windows = [RollingWindow(minutes * 60) for minutes in ROLLING_WINDOWS]
+
+    def add(self, value, count, now=None):
+        now = time.time() if now is None else now
+        for window in self.windows:
+            window.add(now, value, count)
+
+    def rates(self, now=None):
+        """{minutes: (profit_per_min, drops_per_min), or None while the window warms up}"""
+        now = time.time() if now is None else now
+        elapsed = now - self.started
+        rates = {}
+        for minutes, window in zip(ROLLING_WINDOWS, self.windows):
+            # A few seconds of drops scaled up to a minute is noise, not a rate
+            if elapsed < window.span * ROLLING_MIN_FILL:
+                rates[minutes] = None
+                continue
+            value, count = window.totals(now)
+            # Until a window has filled, average over the time we actually have
+            seconds = min(window.span, elapsed)
+            rates[minutes] = (value * 60 / seconds, count * 60 / seconds)
+        return rates
+
+
+# ==================== MAP STATISTICS ====================
+
+MAP_METRICS = ("profit", "duration", "cost", "profit_per_min")
+MAP_QUANTILES = (0.10, 0.50, 0.90, 0.99)
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate (Jain & Chlamtac P-square algorithm).
+    Five markers, O(1) per add and per query, no samples stored.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.n = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.heights
+        if self.n < 5:
+            q.append(x)
+            self.n += 1
+            if self.n == 5:
+                q.sort()
+            return
+        self.n += 1
+
+        # Find the cell x falls into, stretching the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        pos = self.positions
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i]) +
+                    (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qp
+                pos[i] += d
+
+    def value(self):
+        if self.n == 0:
+            return 0.0
+        if self.n < 5:
+            ordered = sorted(self.heights)
+            return ordered[min(int(self.p * self.n), self.n - 1)]
+        return self.heights[2]
+
+
+class MapStatsTable:
+    """
+    Per-map records in typed arrays plus streaming distribution stats.
+
+    The record columns are a ring of at most `capacity` maps (about 50
+    bytes per map), so memory stays bounded however long the session runs.
+    Count/mean/variance (Welford) and the P-square quantiles cover every map
+    ever recorded and are O(1) to query. P-square is rough for tiny samples,
+    so the first EXACT_BELOW maps get exact quantiles from the columns.
+    Each record carries its zone label (interned, stored as a small id), and
+    per-zone totals are kept alongside.
+    """
+
+    EXACT_BELOW = 100
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.count = 0
+        self.map_number = array('l')
+        self.ended_at = array('d')
+        self.zone = array('H')  # index into zone_names
+        self.zone_names = []
+        self._zone_ids = {}
+        self._zone_totals = {}  # zone -> [maps, profit, duration]
+        self.columns = {metric: array('d') for metric in MAP_METRICS}
+        self._mean = dict.fromkeys(MAP_METRICS, 0.0)
+        self._m2 = dict.fromkeys(MAP_METRICS, 0.0)
+        self._min = {}
+        self._max = {}
+        self._sketches = {metric: [P2Quantile(q) for q in MAP_QUANTILES] for metric in MAP_METRICS}
+
+    def add(self, map_number, duration, income, cost, ended_at=None, zone=""):
+        profit = income - cost
+        values = {
+            "profit": profit,
+            "duration": float(duration),
+            "cost": cost,
+            "profit_per_min": profit * 60 / duration if duration > 0 else 0.0,
+        }
+        ended_at = time.time() if ended_at is None else ended_at
+        zone_id = self._zone_ids.get(zone)
+        if zone_id is None:
+            zone_id = self._zone_ids[zone] = len(self.zone_names)
+            self.zone_names.append(zone)
+            self._zone_totals[zone] = [0, 0.0, 0.0]
+        totals = self._zone_totals[zone]
+        totals[0] += 1
+        totals[1] += profit
+        totals[2] += duration
+
+        # Ring buffer once full: overwrite the oldest record
+        slot = self.count % self.capacity
+        if self.count < self.capacity:
+            self.map_number.append(map_number)
+            self.ended_at.append(ended_at)
+            self.zone.append(zone_id)
+            for metric in MAP_METRICS:
+                self.columns[metric].append(values[metric])
+        else:
+            self.map_number[slot] = map_number
+            self.ended_at[slot] = ended_at
+            self.zone[slot] = zone_id
+            for metric in MAP_METRICS:
+                self.columns[metric][slot] = values[metric]
+        self.count += 1
+
+        for metric, x in values.items():
+            delta = x - self._mean[metric]
+            self._mean[metric] += delta / self.count
+            self._m2[metric] += delta * (x - self._mean[metric])
+            self._min[metric] = min(self._min.get(metric, x), x)
+            self._max[metric] = max(self._max.get(metric, x), x)
+            for sketch in self._sketches[metric]:
+                sketch.add(x)
+
+    def summary(self):
+        """{metric: {"count", "mean", "std", "min", "max", "p10", "p50", "p90", "p99"}}"""
+        result = {}
+        for metric in MAP_METRICS:
+            variance = self._m2[metric] / (self.count - 1) if self.count > 1 else 0.0
+            stats = {
+                "count": self.count,
+                "mean": self._mean[metric],
+                "std": variance ** 0.5,
+                "min": self._min.get(metric, 0.0),
+                "max": self._max.get(metric, 0.0),
+            }
+            if 0 < self.count < self.EXACT_BELOW:
+                ordered = sorted(self.columns[metric])
+                for q in MAP_QUANTILES:
+                    stats[f"p{int(q * 100)}"] = ordered[min(int(q * self.count), self.count - 1)]
+            else:
+                for q, sketch in zip(MAP_QUANTILES, self._sketches[metric]):
+                    stats[f"p{int(q * 100)}"] = sketch.value()
+            result[metric] = stats
+        return result
+
+    def recent(self, n=20):
+        """The last n retained maps as dicts, newest first"""
+        records = []
+        stored = min(self.count, self.capacity)
+        for k in range(min(n, stored)):
+            slot = (self.count - 1 - k) % self.capacity
+            record = {"map": self.map_number[slot], "ended_at": self.ended_at[slot],
+                      "zone": self.zone_names[self.zone[slot]]}
+            for metric in MAP_METRICS:
+                record[metric] = self.columns[metric][slot]
+            records.append(record)
+        return records
+
+    def zones(self):
+        """{zone: {"count", "profit", "mean_profit", "profit_per_min"}} over every map recorded"""
+        result = {}
+        for zone, (count, profit, duration) in self._zone_totals.items():
+            result[zone] = {
+                "count": count,
+                "profit": profit,
+                "mean_profit": profit / count,
+                "profit_per_min": profit * 60 / duration if duration > 0 else 0.0,
+            }
+        return result
+
+
+# ==================== CATALOG SEARCH ====================
+
+class CatalogIndex:
+    """
+    Prefix/substring search over item ID, English and Chinese names and type.
+
+    Every 1-3 character gram of the (lower-cased) fields maps to the set of
+    item IDs containing it. A query intersects the postings of its grams and
+    only verifies the few survivors, so a lookup touches a handful of sets
+    instead of scanning the catalog. update() re-indexes only the items
+    whose searchable fields changed.
+    """
+
+    FIELDS = ("name", "name_zh", "type", "type_zh")
+    MAX_GRAM = 3
+
+    def __init__(self):
+        self.postings = {}
+        self.texts = {}  # item_id -> tuple of lower-cased searchable strings
+
+    def update(self, item_db):
+        for item_id in [i for i in self.texts if i not in item_db]:
+            self._remove(item_id)
+
+        for item_id, values in catalog_rows(item_db, self.FIELDS):
+            texts = (item_id,) + tuple(str(value).lower() for value in values)
+            if self.texts.get(item_id) == texts:
+                continue
+            if item_id in self.texts:
+                self._remove(item_id)
+            self.texts[item_id] = texts
+            for gram in self._grams(texts):
+                self.postings.setdefault(gram, set()).add(item_id)
+
+    def _remove(self, item_id):
+        for gram in self._grams(self.texts.pop(item_id)):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def _grams(self, texts):
+        grams = set()
+        for text in texts:
+            for n in range(1, self.MAX_GRAM + 1):
+                for i in range(len(text) - n + 1):
+                    grams.add(text[i:i + n])
+        return grams
+
+    def search(self, query, limit=None):
+        """
+        Item IDs matching query, best first: exact ID, then prefix matches,
+        then substring matches.
+        """
+        query = query.strip().lower()
+        if not query:
+            return list(self.texts)[:limit]
+
+        n = min(len(query), self.MAX_GRAM)
+        candidates = None
+        for gram in sorted({query[i:i + n] for i in range(len(query) - n + 1)},
+                           key=lambda g: len(self.postings.get(g, ()))):
+            ids = self.postings.get(gram)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates & ids
+            if len(candidates) <= 1:
+                break
+
+        ranked = []
+        for item_id in candidates:
+            texts = self.texts[item_id]
+            if item_id == query:
+                rank = 0
+            elif any(text.startswith(query) for text in texts):
+                rank = 1
+            elif any(query in text for text in texts):
+                rank = 2
+            else:
+                continue
+            ranked.append((rank, texts[1], item_id))
+        ranked.sort()
+        return [item_id for _, _, item_id in ranked[:limit]]
+
+
+# ==================== BINARY CATALOG ====================
+
+CATALOG_BIN = "item_catalog.bin"
+CATALOG_MAGIC = b"FTCAT001"
+# magic, item count, string count, string pool bytes
+CATALOG_HEADER = struct.Struct("<8sIII")
+CATALOG_STRING_FIELDS = ("name", "type", "name_zh", "type_zh")
+
+
+def compile_item_catalog(en_path="full_table_en.json", zh_path="full_table.json", out_path=CATALOG_BIN):
+    """
+    Compile the JSON tables into one binary catalog.
+
+    Layout (little endian, every section 8-byte aligned):
+      header | item ids uint32[n] (sorted) | prices float64[n]
+      | string refs uint32[4][n] (name, type, name_zh, type_zh)
+      | string offsets uint32[strings + 1] | UTF-8 string pool
+    Strings are interned, so the ~15 type names are stored once.
+    """
+    with open(en_path, "r", encoding="utf-8") as f:
+        en_table = json.load(f)
+    zh_table = {}
+    if zh_path and os.path.exists(zh_path):
+        with open(zh_path, "r", encoding="utf-8") as f:
+            zh_table = json.load(f)
+
+    ids = sorted(int(item_id) for item_id in en_table)
+    pool = {}
+
+    def intern(text):
+        return pool.setdefault(text, len(pool))
+
+    prices = array('d')
+    refs = {field: array('I') for field in CATALOG_STRING_FIELDS}
+    for item_id in ids:
+        en = en_table[str(item_id)]
+        zh = zh_table.get(str(item_id), {})
+        prices.append(float(en.get("price", 0)))
+        refs["name"].append(intern(en.get("name", "Unknown")))
+        refs["type"].append(intern(en.get("type", "Other")))
+        refs["name_zh"].append(intern(zh.get("name", "")))
+        refs["type_zh"].append(intern(zh.get("type", "")))
+
+    offsets = array('I', [0])
+    blob = bytearray()
+    for text in pool:  # dicts keep insertion order = string index
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+
+    def aligned(data):
+        return data + b"\0" * (-len(data) % 8)
+
+    with open(out_path, "wb") as f:
+        f.write(CATALOG_HEADER.pack(CATALOG_MAGIC, len(ids), len(pool), len(blob)))
+        f.write(aligned(array('I', ids).tobytes()))
+        f.write(prices.tobytes())
+        for field in CATALOG_STRING_FIELDS:
+            f.write(aligned(refs[field].tobytes()))
+        f.write(aligned(offsets.tobytes()))
+        f.write(bytes(blob))
+    log.info("✓ Compiled %d items (%d unique strings) -> %s", len(ids), len(pool), out_path)
+
+
+class BinaryCatalog(MutableMapping):
+    """
+    Dict-like, read-mostly view of a compiled catalog, memory-mapped.
+
+    item_db[item_id] returns the same {"name", "type", "price", ...} dict the
+    JSON loader builds, decoded on first use and then memoized (a session
+    only ever touches a few dozen items), so a repeat lookup is one dict
+    hit; a first lookup is a binary search over the sorted ID column.
+    Writes (price updates) go to the same dict, so the mapped file itself
+    is never modified.
+
+    Opt-in (settings['item_catalog']): it only pays off for catalogs far
+    larger than the bundled tables, see `build_catalog.py --bench`.
+    """
+
+    def __init__(self, path=CATALOG_BIN):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, n_strings, pool_bytes = CATALOG_HEADER.unpack_from(self._mm, 0)
+        if magic != CATALOG_MAGIC:
+            raise ValueError(f"{path} is not an item catalog")
+
+        view = memoryview(self._mm)
+        offset = CATALOG_HEADER.size
+
+        def take(fmt, count, size):
+            nonlocal offset
+            section = view[offset:offset + count * size].cast(fmt)
+            offset += count * size + (-(count * size) % 8)
+            return section
+
+        self._n = n
+        self._ids = take('I', n, 4)
+        self._prices = take('d', n, 8)
+        self._refs = {field: take('I', n, 4) for field in CATALOG_STRING_FIELDS}
+        self._offsets = take('I', n_strings + 1, 4)
+        self._pool = view[offset:offset + pool_bytes]
+        self._items = {}  # decoded or written items
+        self._added = {}  # written IDs that are not in the file (ordered set)
+        self._removed = set()  # deleted IDs that are in the file
+        self._count = n
+
+    def _index(self, item_id):
+        try:
+            key = int(item_id)
+        except (TypeError, ValueError):
+            return -1
+        i = bisect_left(self._ids, key)
+        if i < self._n and self._ids[i] == key:
+            return i
+        return -1
+
+    def _string(self, ref):
+        return str(self._pool[self._offsets[ref]:self._offsets[ref + 1]], "utf-8")
+
+    def __getitem__(self, item_id):
+        item = self._items.get(item_id)
+        if item is not None:
+            return item
+        i = self._index(item_id) if item_id not in self._removed else -1
+        if i < 0:
+            raise KeyError(item_id)
+        item = {field: self._string(self._refs[field][i]) for field in CATALOG_STRING_FIELDS}
+        item["price"] = self._prices[i]
+        self._items[item_id] = item
+        return item
+
+    def __contains__(self, item_id):
+        return item_id in self._items or (item_id not in self._removed and self._index(item_id) >= 0)
+
+    def __setitem__(self, item_id, item):
+        if item_id not in self:
+            self._count += 1
+            if self._index(item_id) < 0:
+                self._added[item_id] = None
+        self._removed.discard(item_id)
+        self._items[item_id] = item
+
+    def __delitem__(self, item_id):
+        if item_id not in self:
+            raise KeyError(item_id)
+        self._items.pop(item_id, None)
+        self._count -= 1
+        if item_id in self._added:
+            del self._added[item_id]
+        else:
+            self._removed.add(item_id)
+
+    def rows(self, fields):
+        """
+        (item_id, (values...)) for every item, read straight from the
+        columns: no per-item dict is built or memoized, so indexing the
+        whole catalog keeps it lazy. Each distinct string is decoded once.
+        """
+        strings = {}
+
+        def value(field, i):
+            if field == "price":
+                return self._prices[i]
+            refs = self._refs.get(field)
+            if refs is None:
+                return ""
+            ref = refs[i]
+            text = strings.get(ref)
+            if text is None:
+                text = strings[ref] = self._string(ref)
+            return text
+
+        for i in range(self._n):
+            item_id = str(self._ids[i])
+            if item_id in self._removed:
+                continue
+            item = self._items.get(item_id)
+            if item is not None:
+                yield item_id, tuple(item.get(field, "") for field in fields)
+            else:
+                yield item_id, tuple(value(field, i) for field in fields)
+        for item_id in self._added:
+            yield item_id, tuple(self._items[item_id].get(field, "") for field in fields)
+
+    def __iter__(self):
+        for i in range(self._n):
+            item_id = str(self._ids[i])
+            if item_id not in self._removed:
+                yield item_id
+        yield from self._added
+
+    def __len__(self):
+        return self._count
+
+
+def catalog_rows(item_db, fields):
+    """(item_id, (values...)) of every item, without decoding a BinaryCatalog record by record"""
+    if isinstance(item_db, BinaryCatalog):
+        return item_db.rows(fields)
+    return ((item_id, tuple(item.get(field, "") for field in fields)) for item_id, item in item_db.items())
+
+
+# ==================== EVENT JOURNAL ====================
+
+JOURNAL_MAGIC = b"FTJRNL01"
+JOURNAL_RUN_FORMAT = "%Y%m%d_%H%M%S"  # one spill folder per run under journal_dir
+JOURNAL_HEADER = struct.Struct("<8sI")  # magic, event count
+JOURNAL_COLUMNS = (
+    ("ts", 'd'),      # unix time
+    ("item", 'I'),    # numeric item ID (ConfigBaseId)
+    ("delta", 'i'),   # + picked up, - consumed
+    ("bag", 'I'),     # bag count after the change
+    ("map", 'I'),     # map number, 0 = not in a map
+    ("client", 'H'),  # index into engine.sessions
+)
+# [lo, hi) of every integer column, in JOURNAL_COLUMNS order after ts
+JOURNAL_LIMITS = tuple(
+    (-(1 << (8 * array(code).itemsize - 1)), 1 << (8 * array(code).itemsize - 1)) if code.islower()
+    else (0, 1 << (8 * array(code).itemsize))
+    for _, code in JOURNAL_COLUMNS[1:])
+
+
+class JournalSegment:
+    """A spilled, read-only block of events, memory-mapped column by column"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = JOURNAL_HEADER.unpack_from(self._mm, 0)
+        if magic != JOURNAL_MAGIC:
+            raise ValueError(f"{path} is not a journal segment")
+        view = memoryview(self._mm)
+        offset = JOURNAL_HEADER.size + (-JOURNAL_HEADER.size % 8)
+        self.columns = {}
+        for name, code in JOURNAL_COLUMNS:
+            size = self.count * array(code).itemsize
+            self.columns[name] = view[offset:offset + size].cast(code)
+            offset += size + (-size % 8)
+
+    @staticmethod
+    def write(path, columns, count):
+        with open(path, "wb") as f:
+            header = JOURNAL_HEADER.pack(JOURNAL_MAGIC, count)
+            f.write(header + b"\0" * (-len(header) % 8))
+            for name, code in JOURNAL_COLUMNS:
+                data = columns[name].tobytes()
+                f.write(data + b"\0" * (-len(data) % 8))
+
+
+class EventJournal:
+    """
+    Every inventory event, stored column-wise in typed arrays.
+
+    The live segment holds at most `max_events` events (~23 bytes each);
+    when it fills up it is written to `directory` as a segment file and
+    read back through mmap, so memory stays flat over multi-day sessions.
+    The spill directory is only created on the first spill; with no
+    directory (replays, benchmarks) every event stays in memory.
+
+    Events are appended in time order, so every segment is sorted by ts
+    and range queries bisect instead of scanning. Query results are typed
+    arrays / plain aggregates - no per-event Python objects are kept.
+    """
+
+    def __init__(self, directory=None, max_events=65536):
+        self.directory = directory
+        self.max_events = max_events
+        self.segments = []
+        self.spilled = 0
+        self._claimed = False  # spill folder created (and owned) by this journal
+        self._new_live()
+
+    @staticmethod
+    def prune_runs(root, keep):
+        """
+        Delete the segments of all but the `keep` newest run folders in `root`.
+        Only folders named like a run and files named like a segment are
+        touched; a folder with anything else in it is left in place.
+        """
+        try:
+            runs = sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+        except OSError:
+            return
+        runs = [name for name in runs if re.fullmatch(r"\d{8}_\d{6}(_\d+)?", name)]
+        for name in runs[:max(len(runs) - keep, 0)]:
+            folder = os.path.join(root, name)
+            try:
+                for entry in os.listdir(folder):
+                    if re.fullmatch(r"segment_\d{6}\.bin", entry):
+                        os.remove(os.path.join(folder, entry))
+                if not os.listdir(folder):
+                    os.rmdir(folder)
+            except OSError as e:
+                log.warning("⚠ Could not prune event journal %s: %s", folder, e)
+
+    def _new_live(self):
+        self.live = {name: array(code) for name, code in JOURNAL_COLUMNS}
+
+    def __len__(self):
+        return self.spilled + len(self.live["ts"])
+
+    def append(self, ts, item_id, delta, bag, map_number=0, client=0):
+        # Validate the whole row first - a value that does not fit its column
+        # must not leave the columns at different lengths
+        try:
+            row = (float(ts), int(item_id), int(delta), int(bag), int(map_number), int(client))
+        except (TypeError, ValueError, OverflowError):
+            events_log.debug("Event not journaled: %s %s %s", item_id, delta, bag)
+            return
+        for value, (lo, hi) in zip(row[1:], JOURNAL_LIMITS):
+            if not lo <= value < hi:
+                events_log.debug("Event not journaled: %s %s %s", item_id, delta, bag)
+                return
+        live = self.live
+        for (name, _), value in zip(JOURNAL_COLUMNS, row):
+            live[name].append(value)
+        if self.directory is not None and len(live["ts"]) >= self.max_events:
+            self.spill()
+
+    def spill(self):
+        count = len(self.live["ts"])
+        if not count:
+            return
+        try:
+            if not self._claimed:
+                self._claim_directory()
+            path = os.path.join(self.directory, f"segment_{len(self.segments):06d}.bin")
+            JournalSegment.write(path, self.live, count)
+            self.segments.append(JournalSegment(path))
+            self.spilled += count
+        except Exception as e:
+            # Keep tracking: lose this block rather than let memory grow
+            log.warning("⚠ Could not spill event journal: %s", e)
+        self._new_live()
+
+    def _claim_directory(self):
+        """Create the spill folder - an engine started in the same second gets its own"""
+        os.makedirs(os.path.dirname(self.directory) or ".", exist_ok=True)
+        base, n = self.directory, 1
+        while True:
+            try:
+                os.mkdir(self.directory)
+                self._claimed = True
+                return
+            except FileExistsError:
+                n += 1
+                self.directory = f"{base}_{n}"
+
+    def _blocks(self, start=None, end=None):
+        """(columns, lo, hi) for each segment overlapping [start, end)"""
+        for columns in [seg.columns for seg in self.segments] + [self.live]:
+            ts = columns["ts"]
+            n = len(ts)
+            if not n:
+                continue
+            if (start is not None and ts[n - 1] < start) or (end is not None and ts[0] >= end):
+                continue
+            lo = bisect_left(ts, start) if start is not None else 0
+            hi = bisect_left(ts, end) if end is not None else n
+            if lo < hi:
+                yield columns, lo, hi
+
+    def query(self, start=None, end=None, item_id=None, client=None):
+        """Events in [start, end) as {column: array}, optionally for one item/client"""
+        result = {name: array(code) for name, code in JOURNAL_COLUMNS}
+        item = int(item_id) if item_id is not None else None
+        for columns, lo, hi in self._blocks(start, end):
+            if item is None and client is None:
+                for name, _ in JOURNAL_COLUMNS:
+                    result[name].extend(columns[name][lo:hi])
+                continue
+            items, clients = columns["item"], columns["client"]
+            for i in range(lo, hi):
+                if (item is None or items[i] == item) and (client is None or clients[i] == client):
+                    for name, _ in JOURNAL_COLUMNS:
+                        result[name].append(columns[name][i])
+        return result
+
+    def item_totals(self, start=None, end=None, client=None):
+        """{item_id: [picked_up, consumed]} over [start, end)"""
+        totals = {}
+        for columns, lo, hi in self._blocks(start, end):
+            items, deltas, clients = columns["item"], columns["delta"], columns["client"]
+            for i in range(lo, hi):
+                if client is not None and clients[i] != client:
+                    continue
+                entry = totals.get(items[i])
+                if entry is None:
+                    entry = totals[items[i]] = [0, 0]
+                if deltas[i] > 0:
+                    entry[0] += deltas[i]
+                else:
+                    entry[1] -= deltas[i]
+        return {str(item): entry for item, entry in totals.items()}
+
+    def time_range(self):
+        blocks = [seg.columns["ts"] for seg in self.segments if seg.count] + \
+                 ([self.live["ts"]] if len(self.live["ts"]) else [])
+        if not blocks:
+            return None
+        return blocks[0][0], blocks[-1][len(blocks[-1]) - 1]
+
+
+# ==================== LOG INDEX ====================
+
+LOG_INDEX_MAGIC = b"FTLIDX01"
+# magic, st_dev, st_ino, log bytes covered, head length, sha1 of the log's first bytes
+LOG_INDEX_HEADER = struct.Struct("<8sQQQI20s")
+LOG_INDEX_RECORD = struct.Struct("<QdB")  # line offset, line timestamp, kind
+LOG_INDEX_HEAD = 256
+
+KIND_BAG = 1  # BagMgr@ inventory line
+KIND_MAP = 2  # PageApplyBase@ _UpdateGameEnd scene change
+
+LOG_LINE_MARKERS = ((b"BagMgr@", KIND_BAG), (b"PageApplyBase@ _UpdateGameEnd", KIND_MAP))
+LOG_TIMESTAMP_RE = re.compile(rb"^\[(\d{4})\.(\d{2})\.(\d{2})-(\d{2})\.(\d{2})\.(\d{2}):(\d{3})\]")
+
+
+def classify_log_line(line):
+    """Index kind of a raw log line, or 0 if it is noise"""
+    for marker, kind in LOG_LINE_MARKERS:
+        if marker in line:
+            return kind
+    return 0
+
+
+def find_log_lines(data, begin=0):
+    """
+    (start, end, kind) of the complete relevant lines in `data` from
+    `begin` on, in order. One bytes.find() pass per marker, so the noise
+    in between is never looked at line by line. A line is reported once,
+    with its first matching marker (as classify_log_line does); a line
+    without its newline yet is left out.
+    """
+    found = {}
+    for marker, kind in LOG_LINE_MARKERS:
+        pos = data.find(marker, begin)
+        while pos != -1:
+            start = data.rfind(b"\n", 0, pos) + 1
+            end = data.find(b"\n", pos)
+            if end == -1:
+                break  # incomplete line
+            found.setdefault(start, (start, end, kind))
+            pos = data.find(marker, end)
+    return [found[start] for start in sorted(found)]
+
+
+def iter_log_frames(lines):
+    """
+    Join consecutive log lines (text, newline kept) that share a
+    '[2025.10.23-12.34.56:789]' stamp - one game frame, e.g. all the moves
+    of a bag sort - and yield each frame's text. Lines without a stamp stay
+    with the frame before them.
+    """
+    frame, stamp = [], None
+    for line in lines:
+        if line.startswith("["):
+            line_stamp = line[:line.find("]") + 1]
+            if frame and line_stamp != stamp:
+                yield "".join(frame)
+                frame = []
+            stamp = line_stamp
+        frame.append(line)
+    if frame:
+        yield "".join(frame)
+
+
+def log_line_timestamp(line):
+    """Unix time from the UE '[2025.10.23-12.34.56:789]' prefix (bytes or text), 0.0 if absent"""
+    if isinstance(line, str):
+        line = line[:32].encode("ascii", "replace")
+    m = LOG_TIMESTAMP_RE.match(line)
+    if not m:
+        return 0.0
+    try:
+        y, mo, d, h, mi, s, ms = (int(g) for g in m.groups())
+        return datetime(y, mo, d, h, mi, s, ms * 1000).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class LogIndex:
+    """
+    Sidecar index of the few UE_game.log lines we care about.
+
+    One 17-byte record (offset, timestamp, kind) per BagMgr / map-change
+    line, stored under log_index/ (never next to the game's own files).
+    The header pins the log's identity - device, inode and a hash of its
+    first bytes - plus how many log bytes are covered; if the log was
+    recreated or truncated the index is thrown away and rebuilt.
+
+    The tailer adds records as it reads; catch_up() indexes any backlog
+    (e.g. the history skipped at startup) in time-boxed chunks; records()
+    and read_lines() let replays seek straight to the relevant lines.
+    """
+
+    SCAN_CHUNK = 8 * 1024 * 1024
+
+    def __init__(self, log_path, index_dir="log_index"):
+        self.log_path = log_path
+        digest = hashlib.sha1(os.path.abspath(log_path).encode("utf-8")).hexdigest()[:10]
+        self.path = os.path.join(index_dir, f"{os.path.basename(log_path)}_{digest}.idx")
+        self.indexed = 0  # log bytes covered by the index
+        self.count = 0
+        self._file = None
+        self._header = None
+
+    def open(self):
+        """Attach to the current log file, rebuilding the index if it's stale"""
+        self.close()
+        st = os.stat(self.log_path)
+        head = b""
+        with open(self.log_path, "rb") as f:
+            head = f.read(LOG_INDEX_HEAD)
+        fingerprint = hashlib.sha1(head).digest()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        reused = False
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                raw = f.read(LOG_INDEX_HEADER.size)
+            if len(raw) == LOG_INDEX_HEADER.size:
+                magic, dev, ino, indexed, head_len, digest = LOG_INDEX_HEADER.unpack(raw)
+                reused = (magic == LOG_INDEX_MAGIC and (dev, ino) == (st.st_dev, st.st_ino)
+                          and indexed <= st.st_size
+                          and digest == hashlib.sha1(head[:head_len]).digest())
+
+        if reused:
+            self._file = open(self.path, "r+b")
+            self._header = (st.st_dev, st.st_ino, head_len, digest)
+            self.indexed = indexed
+            records = (os.path.getsize(self.path) - LOG_INDEX_HEADER.size) // LOG_INDEX_RECORD.size
+            self.count = records
+            # Drop a torn trailing record from a crash mid-write
+            self._file.truncate(LOG_INDEX_HEADER.size + records * LOG_INDEX_RECORD.size)
+        else:
+            self._file = open(self.path, "w+b")
+            self._header = (st.st_dev, st.st_ino, len(head), fingerprint)
+            self.indexed = 0
+            self.count = 0
+            self._write_header()
+        log.info("✓ Log index %s: %d lines, %d bytes covered", "reused" if reused else "rebuilt",
+                 self.count, self.indexed)
+        return reused
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write_header(self):
+        dev, ino, head_len, digest = self._header
+        self._file.seek(0)
+        self._file.write(LOG_INDEX_HEADER.pack(LOG_INDEX_MAGIC, dev, ino, self.indexed, head_len, digest))
+
+    # ---------- writing ----------
+
+    def add_lines(self, data, base_offset):
+        """
+        Index the complete lines in `data` (bytes read from base_offset).
+        Lines before self.indexed are already covered and skipped, so
+        re-reading part of the log never duplicates records.
+        """
+        if self._file is None or base_offset + len(data) <= self.indexed:
+            return
+        if base_offset > self.indexed:
+            return  # gap - catch_up() will fill it in order
+
+        self._file.seek(0, 2)
+        for start, end, kind in find_log_lines(data, max(self.indexed - base_offset, 0)):
+            self._file.write(LOG_INDEX_RECORD.pack(base_offset + start, log_line_timestamp(data[start:end]), kind))
+            self.count += 1
+        complete = data.rfind(b"\n") + 1
+        self.indexed = max(self.indexed, base_offset + complete)
+        self._write_header()
+        self._file.flush()
+
+    def catch_up(self, upto, budget=0.2):
+        """Index log bytes [indexed, upto) for up to `budget` seconds; True when done"""
+        if self._file is None:
+            return True
+        deadline = time.time() + budget
+        with open(self.log_path, "rb") as f:
+            while self.indexed < upto and time.time() < deadline:
+                f.seek(self.indexed)
+                data = f.read(min(self.SCAN_CHUNK, upto - self.indexed))
+                if not data or b"\n" not in data:
+                    break
+                self.add_lines(data, self.indexed)
+        return self.indexed >= upto or self._file is None
+
+    # ---------- reading ----------
+
+    def records(self, kinds=None, start=0, end=None):
+        """Yield (offset, timestamp, kind) for indexed lines in [start, end)"""
+        if self._file is None:
+            return
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(LOG_INDEX_HEADER.size)
+            data = f.read(self.count * LOG_INDEX_RECORD.size)
+        for offset, ts, kind in LOG_INDEX_RECORD.iter_unpack(data):
+            if offset < start or (kinds and kind not in kinds):
+                continue
+            if end is not None and offset >= end:
+                break
+            yield offset, ts, kind
+
+    def read_lines(self, kinds=None, start=0, end=None):
+        """Yield (offset, line text) for indexed lines, seeking past the noise"""
+        with open(self.log_path, "rb") as f:
+            for offset, ts, kind in self.records(kinds, start, end):
+                f.seek(offset)
+                yield offset, f.readline().decode("utf-8", errors="ignore")
+
+
+LOG_STREAM_BUFFER = 1024 * 1024  # decompressed bytes held per read of an archived log
+LOG_COMPRESSION_MAGIC = ((b"\x1f\x8b", "gzip"), (b"\x28\xb5\x2f\xfd", "zstd"))
+
+
+def log_compression(log_path):
+    """'gzip', 'zstd' or None for a plain log - by magic bytes, not file name"""
+    with open(log_path, "rb") as f:
+        head = f.read(4)
+    for magic, compression in LOG_COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_log_stream(log_path, compression=None):
+    """
+    Binary file object over a log's text. Archived copies (UE_game.log.gz,
+    .zst) are decompressed as they are read, through a bounded buffer -
+    nothing is written to disk and memory doesn't grow with the file.
+    """
+    if compression is None:
+        return open(log_path, "rb")
+    if compression == "gzip":
+        return io.BufferedReader(gzip.open(log_path, "rb"), LOG_STREAM_BUFFER)
+    if not HAS_ZSTD:
+        raise RuntimeError(f"{os.path.basename(log_path)} is zstd-compressed: pip install zstandard")
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        open(log_path, "rb"), read_size=LOG_STREAM_BUFFER, read_across_frames=True)
+    return io.BufferedReader(reader, LOG_STREAM_BUFFER)
+
+
+def iter_log_lines(log_path, index=None, kinds=(KIND_BAG, KIND_MAP), start=0, end=None):
+    """
+    Yield (offset, line) for the relevant lines of a log: through the
+    sidecar index when there is one, otherwise by scanning every line.
+    gzip/zstd archives are streamed; their offsets are into the
+    decompressed text (i.e. the original log's).
+    """
+    if index is not None:
+        yield from index.read_lines(kinds, start, end)
+        return
+    compression = log_compression(log_path)
+    with open_log_stream(log_path, compression) as f:
+        base = 0  # log offset of data[0]
+        if compression is None:
+            f.seek(start)
+            base = start
+        tail = b""
+        while end is None or base < end:
+            chunk = f.read(LOG_STREAM_BUFFER)
+            # Carry the unfinished last line over; at EOF, close it off
+            data = tail + (chunk or b"\n") if tail else chunk
+            if not data:
+                break
+            for line_start, line_end, kind in find_log_lines(data):
+                offset = base + line_start
+                if end is not None and offset >= end:
+                    break
+                if offset >= start and kind in kinds:
+                    yield offset, data[line_start:line_end + 1].decode("utf-8", errors="ignore")
+            if not chunk:
+                break
+            complete = data.rfind(b"\n") + 1
+            tail = data[complete:]
+            base += complete
+
+
+# ==================== MAP RULES ====================
+
+MAP_ACTIONS = ("enter", "exit", "ignore")
+NEXT_SCENE_RE = re.compile(r"NextSceneName = World'([^']*)'")
+
+DEFAULT_MAP_RULES = [
+    # First matching rule wins; "zone" labels the map ("" = scene name)
+    {"pattern": "/01SD/XZ_YuJinZhiXiBiNanSuo200", "action": "exit", "zone": "Hideout"},
+    {"pattern": "/Game/Art/Maps/", "action": "enter", "zone": ""},
+]
+
+
+class PatternAutomaton:
+    """
+    Aho-Corasick automaton: finds which of many substrings occur in a text
+    in one pass over it, however many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for i, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                node = nxt
+            self.out[node] += (i,)
+
+        # Breadth-first so each node's fail target is finished before it
+        pending = list(self.goto[0].values())
+        while pending:
+            node = pending.pop(0)
+            for ch, nxt in self.goto[node].items():
+                pending.append(nxt)
+                if node:
+                    f = self.fail[node]
+                    while f and ch not in self.goto[f]:
+                        f = self.fail[f]
+                    self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def find(self, text):
+        """Set of indexes of the patterns that occur in text"""
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class MapRules:
+    """
+    Scene-change rules from settings['map_rules']: each maps a substring of
+    the next scene's path to "enter", "exit" or "ignore" plus a zone label.
+    All patterns share one automaton, so a map line is scanned once.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = []
+        for rule in DEFAULT_MAP_RULES if rules is None else rules:
+            pattern, action = rule.get("pattern", ""), rule.get("action", "")
+            if not pattern or action not in MAP_ACTIONS:
+                log.warning("⚠ Ignoring map rule %r (needs a pattern and one of %s)", rule, MAP_ACTIONS)
+                continue
+            self.rules.append((pattern, action, rule.get("zone", "")))
+        self.automaton = PatternAutomaton([pattern for pattern, _, _ in self.rules])
+
+    def match(self, line):
+        """(action, zone) for a PageApplyBase@ _UpdateGameEnd line, or None"""
+        m = NEXT_SCENE_RE.search(line)
+        if not m:
+            return None
+        scene = m.group(1)
+        found = self.automaton.find(scene)
+        if not found:
+            return None
+        _, action, zone = self.rules[min(found)]
+        # "/Game/Art/Maps/01SD/Foo/Foo.Foo" -> "Foo"
+        return action, zone or scene.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+# ==================== PRICE FEED ====================
+
+PRICE_FEED_FILE = "full_table_en.json"  # what a directory feed is expected to contain
+
+
+class PriceFeed:
+    """
+    Background price updates from an upstream table shaped like
+    full_table_en.json ({item_id: {"price", "name", "type", ...}}).
+
+    source is an http(s) URL or a local file/directory (a directory is
+    read as <dir>/full_table_en.json). HTTP requests are conditional
+    (If-None-Match / If-Modified-Since) over one kept-alive connection, and
+    a local file is only re-read when its mtime or size changed, so an
+    unchanged feed costs a 304 or a stat. Each good table is diffed against
+    the previous one and only the changed entries are handed to
+    engine.merge_prices (via engine.dispatch); the table and its
+    validators are saved to snapshot_path so a restart works offline and
+    can start with a conditional request.
+    """
+
+    TIMEOUT = 15
+
+    def __init__(self, engine, source, interval=300, snapshot_path="price_snapshot.json"):
+        self.engine = engine
+        self.source = source
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.is_http = source.startswith(("http://", "https://"))
+        self.items = {}  # last good table
+        self.etag = self.last_modified = None
+        self.last_error = None
+        self._conn = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_settings(cls, engine):
+        """None unless settings['price_feed'] names a source"""
+        source = engine.settings.get('price_feed', "")
+        if not source:
+            return None
+        return cls(engine, source, engine.settings.get('price_feed_interval', 300),
+                   engine.settings.get('price_feed_snapshot', "price_snapshot.json"))
+
+    def start(self):
+        self._stop.clear()
+        threading.Thread(target=self._run, daemon=True).start()
+        log.info("✓ Price feed started: %s (every %ss)", self.source, self.interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def _run(self):
+        self.load_snapshot()
+        while not self._stop.is_set():
+            self.fetch_once()
+            self._stop.wait(self.interval)
+
+    # ---------- snapshot ----------
+
+    def load_snapshot(self):
+        """Apply the last good table from disk; its validators make the next fetch conditional"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("source") != self.source:
+                return  # feed moved - start over
+            self.etag, self.last_modified = snapshot.get("etag"), snapshot.get("last_modified")
+            self._apply(snapshot.get("items", {}))
+        except Exception as e:
+            log.warning("⚠ Could not load price snapshot %s: %s", self.snapshot_path, e)
+
+    def save_snapshot(self):
+        # Write-then-rename so a crash never leaves a half-written snapshot
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "etag": self.etag, "last_modified": self.last_modified,
+                       "fetched_at": time.time(), "items": self.items}, f, ensure_ascii=False)
+        os.replace(tmp, self.snapshot_path)
+
+    # ---------- fetching ----------
+
+    def fetch_once(self):
+        """
+        One conditional fetch. Returns the number of changed entries, 0 when
+        the feed is unchanged, or None on error (the last good table stays).
+        """
+        try:
+            table = self._fetch_http() if self.is_http else self._fetch_path()
+            if table is None:
+                return 0
+            if not isinstance(table, dict):
+                raise ValueError("feed is not an {item_id: entry} table")
+            changed = self._apply(table)
+            if self.snapshot_path:
+                self.save_snapshot()
+            self.last_error = None
+            return changed
+        except Exception as e:
+            if str(e) != self.last_error:
+                log.warning("⚠ Price feed failed (keeping last prices): %s", e)
+            self.last_error = str(e)
+            return None
+
+    def _apply(self, table):
+        changed = {item_id: entry for item_id, entry in table.items()
+                   if isinstance(entry, dict) and "price" in entry and self.items.get(item_id) != entry}
+        self.items = table
+        if changed:
+            self.engine.dispatch(lambda: self.engine.merge_prices(changed))
+        return len(changed)
+
+    def _fetch_path(self):
+        path = os.path.join(self.source, PRICE_FEED_FILE) if os.path.isdir(self.source) else self.source
+        st = os.stat(path)
+        validator = f"{st.st_mtime_ns}-{st.st_size}"
+        if validator == self.etag:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        self.etag = validator
+        return table
+
+    def _fetch_http(self):
+        url = urlsplit(self.source)
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+        headers = {"Accept": "application/json"}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        # One kept-alive connection; if the server dropped it, reconnect once
+        for attempt in (0, 1):
+            if self._conn is None:
+                conn_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+                self._conn = conn_class(url.hostname, url.port, timeout=self.TIMEOUT)
+            try:
+                self._conn.request("GET", path, headers=headers)
+                response = self._conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+
+        if response.getheader("Connection", "").lower() == "close":
+            self._conn.close()
+            self._conn = None
+        if response.status == 304:
+            return None
+        if response.status != 200:
+            raise ValueError(f"HTTP {response.status} {response.reason}")
+        table = json.loads(body.decode("utf-8"))
+        self.etag = response.getheader("ETag")
+        self.last_modified = response.getheader("Last-Modified")
+        return table
+
+
+# ==================== EVENT BUS ====================
+
+# Typed events; every one starts with ts (unix time) and client (session name)
+DropEvent = namedtuple("DropEvent", "ts client item_id name count value map_number zone")
+ConsumeEvent = namedtuple("ConsumeEvent", "ts client item_id name count value map_number zone")
+MapStartEvent = namedtuple("MapStartEvent", "ts client map_number zone")
+MapEndEvent = namedtuple("MapEndEvent", "ts client map_number zone duration income cost profit")
+StatusEvent = namedtuple("StatusEvent", "ts client text")
+DropAlertEvent = namedtuple("DropAlertEvent", "ts client item_id name count value threshold map_number zone")
+
+BUS_POLICIES = ("drop_oldest", "coalesce", "block")
+
+
+def coalesce_key(event):
+    """Events with the same key can be folded into one, see coalesce_events; None never folds"""
+    if isinstance(event, (DropEvent, ConsumeEvent)):
+        return type(event), event.client, event.item_id, event.map_number
+    return None
+
+
+def coalesce_events(queued, event):
+    """
+    Merged event if the two can be folded into one (same pickup/consumption
+    of the same item on the same client), otherwise None. The older ts is
+    kept so lag stays honest.
+    """
+    key = coalesce_key(event)
+    if key is not None and coalesce_key(queued) == key:
+        return queued._replace(count=queued.count + event.count, value=queued.value + event.value)
+    return None
+
+
+class Subscription:
+    """
+    One subscriber: a bounded queue drained by its own thread, so a slow
+    callback only ever delays itself.
+
+    policy decides how the queue stays bounded:
+      drop_oldest  when full, evict the oldest queued event
+      coalesce     when full, fold the event into the queued one for the same
+                   item (see coalesce_events) so a burst shrinks instead of
+                   evicting; with nothing to fold, evict the oldest. Below
+                   maxsize events are delivered unmerged and in order
+      block        when full, wait for room, then evict the oldest - lossless
+                   while the subscriber keeps up. The waits of one burst share
+                   a single block_timeout budget (renewed once an event finds
+                   room), so a burst of N events stalls the publisher - the
+                   Tk thread in the GUI - for block_timeout at most, not N times
+    batch > 0 delivers lists of up to `batch` events instead of single events.
+    """
+
+    def __init__(self, bus, callback, types=None, maxsize=1024, policy="drop_oldest",
+                 batch=0, block_timeout=0.1, name=None):
+        if policy not in BUS_POLICIES:
+            raise ValueError(f"policy must be one of {BUS_POLICIES}")
+        self.bus = bus
+        self.callback = callback
+        self.types = tuple(types) if types else None
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.batch = batch
+        self.block_timeout = block_timeout
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        self.queue = deque()
+        self.merge_targets = {}  # coalesce_key -> [queued event, its merged value]
+        self.cond = threading.Condition()
+        self.closed = False
+        self.published = self.delivered = self.dropped = self.coalesced = self.errors = 0
+        self.max_depth = 0
+        self.block_deadline = None  # end of the current burst's block budget
+        self.lagging = False  # evicting since the queue last had room (warned once)
+        self.latency = 0.0  # event ts -> callback done, for the latest delivery
+        threading.Thread(target=self._run, daemon=True, name=f"bus-{self.name}").start()
+
+    def wants(self, event):
+        return self.types is None or isinstance(event, self.types)
+
+    def offer(self, event):
+        """Queue one event (publisher side; a whole burst blocks for block_timeout at most)"""
+        warn = False
+        with self.cond:
+            if self.closed:
+                return
+            self.published += 1
+            if len(self.queue) >= self.maxsize:
+                if self.policy == "coalesce" and self._coalesce(event):
+                    return
+                if self.policy == "block":
+                    if self.block_deadline is None:
+                        self.block_deadline = time.monotonic() + self.block_timeout
+                    self.cond.wait_for(lambda: len(self.queue) < self.maxsize or self.closed,
+                                       max(0.0, self.block_deadline - time.monotonic()))
+                if len(self.queue) >= self.maxsize:
+                    self._popleft()
+                    self.dropped += 1
+                    warn = not self.lagging
+                    self.lagging = True
+            else:
+                self.block_deadline = None
+                self.lagging = False
+            self.queue.append(event)
+            if self.policy == "coalesce":
+                key = coalesce_key(event)
+                if key is not None and key not in self.merge_targets:
+                    self.merge_targets[key] = [event, event]
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.cond.notify_all()
+        if warn:
+            log.warning("⚠ Event subscriber %s is lagging - dropping events", self.name)
+
+    def _coalesce(self, event):
+        target = self.merge_targets.get(coalesce_key(event))
+        if target is None:
+            return False
+        target[1] = coalesce_events(target[1], event)
+        self.coalesced += 1
+        return True
+
+    def _popleft(self):
+        """Oldest queued event, with whatever was folded into it"""
+        event = self.queue.popleft()
+        if self.merge_targets:
+            key = coalesce_key(event)
+            target = self.merge_targets.get(key)
+            if target is not None and target[0] is event:
+                del self.merge_targets[key]
+                return target[1]
+        return event
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.queue or self.closed)
+                if not self.queue:
+                    return  # closed and drained
+                events = [self._popleft() for _ in range(min(self.batch or 1, len(self.queue)))]
+                self.cond.notify_all()  # wake a blocked publisher
+            try:
+                self.callback(events if self.batch else events[0])
+            except Exception as e:
+                self.errors += 1
+                log.error("Event subscriber %s failed: %s", self.name, e)
+            self.delivered += len(events)
+            self.latency = time.time() - events[0].ts
+
+    def close(self):
+        """Stop after delivering what is already queued"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.bus.unsubscribe(self)
+
+    def stats(self):
+        with self.cond:
+            depth = len(self.queue)
+            lag = time.time() - self.queue[0].ts if depth else 0.0
+        return {
+            "policy": self.policy, "depth": depth, "max_depth": self.max_depth, "maxsize": self.maxsize,
+            "published": self.published, "delivered": self.delivered, "dropped": self.dropped,
+            "coalesced": self.coalesced, "errors": self.errors,
+            "lag": lag,  # age of the oldest undelivered event
+            "latency": self.latency,
+        }
+
+
+class EventBus:
+    """
+    Publish/subscribe for plugins (sounds, Discord relays, overlays...).
+
+    publish() runs on the engine's dispatch thread and only appends to each
+    interested subscriber's queue; callbacks run on the subscribers' own
+    threads, so a slow plugin never stalls parsing or the UI.
+
+        sub = engine.bus.subscribe(on_drop, types=(DropEvent,), policy="coalesce")
+        engine.bus.stats()  # per-subscriber depth, lag, drops...
+    """
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, callback, types=None, **options):
+        """See Subscription for maxsize, policy, batch, block_timeout and name"""
+        sub = Subscription(self, callback, types, **options)
+        self.subscribers = self.subscribers + [sub]  # copy-on-write: publish never locks
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers = [s for s in self.subscribers if s is not sub]
+
+    def publish(self, event):
+        for sub in self.subscribers:
+            if sub.wants(event):
+                sub.offer(event)
+
+    def stats(self):
+        return {sub.name: sub.stats() for sub in self.subscribers}
+
+
+# ==================== DROP ALERTS ====================
+
+class DropAlerts:
+    """
+    High-value drop alerts.
+
+    The rules - minimum drop value (count x price) per item id, per item
+    type, and a default - are compiled into one {item_id: threshold} table
+    whenever they or the catalog change, so checking a drop is a single
+    dict lookup. An item rule beats a type rule, which beats the default;
+    null switches alerts off for that item or type.
+    """
+
+    HISTORY = 200
+
+    def __init__(self, rules=None):
+        self.rules = rules or {}
+        self.table = {}
+        self.history = deque(maxlen=self.HISTORY)  # DropAlertEvent, newest last
+
+    def compile(self, item_db, rules=None):
+        if rules is not None:
+            self.rules = rules
+        items = self.rules.get("items") or {}
+        types = self.rules.get("types") or {}
+        default = self.rules.get("default")
+        table = {}
+        for item_id, (item_type,) in catalog_rows(item_db, ("type",)):
+            if item_id in items:
+                threshold = items[item_id]
+            else:
+                threshold = types.get(item_type, default)
+            if threshold is not None:
+                table[item_id] = float(threshold)
+        self.table = table  # swapped whole, the hot path never sees it half built
+        log.info("✓ Drop alerts: %d items watched", len(table))
+
+    def check(self, item_id, value):
+        """Threshold this drop reaches, or None"""
+        threshold = self.table.get(item_id)
+        if threshold is not None and value >= threshold:
+            return threshold
+        return None
+
+    def recent(self, client=None):
+        return [alert for alert in self.history if client is None or alert.client == client]
+
+
+# ==================== TRACKING ENGINE ====================
+
+def default_settings():
+    return {
+        "map_cost": 0.0,
+        "opacity": 1.0,
+        "apply_tax": False,
+        "log_path": "",
+        "log_discovery": "auto",  # "auto" = find via game window, "path" = use log_path only
+        "clients": [],  # extra clients: [{"name": "Alt", "log_path": "..."}]
+        "log_level": "INFO",
+        "event_log_level": "OFF",  # per-drop diagnostics, see LOG_LEVELS
+        "server_host": "127.0.0.1",  # headless stats server
+        "server_port": 8765,
+        "server_rate": 2.0,  # max WebSocket updates per second
+        "journal_dir": "journal",  # spilled event segments, one folder per run ("" = keep in memory)
+        "journal_memory_events": 65536,  # events kept in RAM before spilling
+        "journal_keep_runs": 5,  # spill folders of earlier runs kept at startup, older ones are deleted
+        "chart_big_drop": 100.0,  # drops worth at least this are marked on the chart
+        "drop_alerts": {"default": 1000.0, "types": {}, "items": {}},  # min drop value per item id/type (null = never), see DropAlerts
+        "alert_sound": True,
+        "log_index_dir": "log_index",  # sidecar offset index of the relevant log lines ("" = off)
+        "item_catalog": "",  # compiled catalog from build_catalog.py, e.g. "item_catalog.bin" ("" = JSON tables)
+        "map_rules": [dict(rule) for rule in DEFAULT_MAP_RULES],  # scene patterns -> enter/exit/ignore + zone, see MapRules
+        "price_feed": "",  # http(s) URL or local file/folder with a full_table_en.json-style table ("" = off)
+        "price_feed_interval": 300,  # seconds between conditional fetches
+        "price_feed_snapshot": "price_snapshot.json"  # last good feed table
+    }
+
+
+def load_settings_file(settings, path="config.json"):
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f))
+    except:
+        pass
+
+def load_item_database(path="full_table_en.json", zh_path="full_table.json", bin_path=None):
+    # Prefer a compiled catalog (opt-in) unless the JSON tables were edited after it
+    if bin_path and os.path.exists(bin_path):
+        json_mtime = max((os.path.getmtime(p) for p in (path, zh_path) if p and os.path.exists(p)), default=0)
+        if os.path.getmtime(bin_path) >= json_mtime:
+            try:
+                item_db = BinaryCatalog(bin_path)
+                log.info("✓ Loaded %d items from %s", len(item_db), bin_path)
+                return item_db
+            except Exception as e:
+                log.warning("⚠ Error loading %s: %s", bin_path, e)
+
+    item_db = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            full_table = json.load(f)
+        for item_id, data in full_table.items():
+            item_db[item_id] = {
+                "name": data.get("name", "Unknown"),
+                "type": data.get("type", "Other"),
+                "price": data.get("price", 0)
+            }
+        log.info("✓ Loaded %d items from database", len(item_db))
+
+        # Chinese names are optional - only used for search
+        if zh_path and os.path.exists(zh_path):
+            with open(zh_path, "r", encoding="utf-8") as f:
+                zh_table = json.load(f)
+            for item_id, data in zh_table.items():
+                if item_id in item_db:
+                    item_db[item_id]["name_zh"] = data.get("name", "")
+                    item_db[item_id]["type_zh"] = data.get("type", "")
+    except Exception as e:
+        log.warning("⚠ Error loading database: %s", e)
+        item_db = {
+            "100300": {"name": "初火源质", "type": "硬通货", "price": 1.0},
+            "100200": {"name": "初火灵砂", "type": "硬通货", "price": 0.002},
+            "5028": {"name": "异界回响", "type": "硬通货", "price": 0.14},
+        }
+    return item_db
+
+
+BAG_SLOT_RE = re.compile(r'PageId\s*=\s*(\d+)\s+SlotId\s*=\s*(\d+)')
+
+
+def parse_bag_line(line):
+    """
+    (item_id, count, slot) from a BagMgr line, or None.
+    - PageId = [PAGE] SlotId = [SLOT] (bag slot, if the line has one)
+    - ConfigBaseId = [ITEM_ID] (item ID)
+    - Num = [COUNT] (stack size in that slot NOW)
+    slot is (page, slot) or None for lines without one. A slot line with no
+    item (RemoveBagItem) gives (None, 0, slot): the slot was emptied.
+    """
+    slot_match = BAG_SLOT_RE.search(line)
+    slot = (int(slot_match.group(1)), int(slot_match.group(2))) if slot_match else None
+    base_id_match = re.search(r'ConfigBaseId\s*=\s*(\d+)', line)
+    num_match = re.search(r'Num\s*=\s*(\d+)', line)
+    if base_id_match and num_match:
+        return base_id_match.group(1), int(num_match.group(1)), slot
+    if slot and "Remove" in line:
+        return None, 0, slot
+    return None
+
+
+class BagInventory:
+    """
+    Bag contents keyed by (PageId, SlotId), with per-item totals kept up to
+    date on every change (O(1) per line).
+
+    Num on a BagMgr line is the size of one stack, not the item's total, so
+    an item spread over several slots or pages must be summed per slot -
+    comparing raw Num values made stack splits and sorting look like
+    pickups and consumption. Lines without a slot (older log format) are
+    treated as one slot per item, i.e. the old behaviour.
+    """
+
+    def __init__(self):
+        self.slots = {}  # (page, slot) -> (item_id, count)
+        self.totals = {}  # item_id -> count over all slots
+
+    def total(self, item_id):
+        return self.totals.get(item_id, 0)
+
+    def set(self, item_id, count, slot=None):
+        """Apply one BagMgr line; item_id None or count 0 empties the slot"""
+        key = slot if slot is not None else item_id
+        held = self.slots.pop(key, None)
+        if held:
+            self._add(held[0], -held[1])
+        if item_id is not None and count > 0:
+            self.slots[key] = (item_id, count)
+            self._add(item_id, count)
+
+    def _add(self, item_id, n):
+        total = self.totals.get(item_id, 0) + n
+        if total:
+            self.totals[item_id] = total
+        else:
+            self.totals.pop(item_id, None)
+
+
+class LogSession:
+    """
+    Tracking state for one game client: its log tailer, bag counts and map.
+
+    The item database and settings are shared through the engine, so an
+    extra client only costs this object and one os.stat() per poll.
+    """
+
+    def __init__(self, engine, name, log_path="", discovery_mode="auto", persist_path=False):
+        self.engine = engine
+        self.name = name
+        self.discovery = LogDiscovery(discovery_mode, log_path)
+        self.persist_path = persist_path  # write the found path back to settings['log_path']
+        self.log_position = 0
+        self.index = None  # LogIndex of the attached log
+        self.baseline_until = None  # rebuild bag counts from the log up to here
+        self._baseline = None  # (history BagInventory, line iterator) while rebuilding
+        self.held_frame = ""  # last frame read; may continue in the next read
+        self.held_at = 0.0  # monotonic time the held frame last grew
+        self.write_drop_log = True
+        self.status = ("Initializing...", 'gray')
+        self.waiting_message = None  # discovery message last shown while detached
+        self.clock = time.time  # event time; replay_log swaps in the log's own timestamps
+
+        # Bag contents per slot, to calculate deltas - persists across maps and resets
+        self.inventory = BagInventory()
+        self.start_time = self.clock()
+        self.reset()
+
+    def reset(self):
+        """
+        Reset all statistics.
+
+        IMPORTANT: We do NOT reset the inventory here!
+        - inventory tracks the last known bag state
+        - It's needed to calculate deltas (new - old = picked up amount)
+        - Resetting it would cause the next pickup to show the full bag count
+        """
+        self.current_time = self.total_time = 0
+        self.current_income = self.total_income = 0
+        self.current_map_cost = 0.0  # Auto-calculated from consumed items
+        self.total_map_cost = 0.0  # Cumulative map cost across all maps
+        self.map_count = 0
+        self.drops_current = {}
+        self.drops_total = {}
+        self.consumed_items_current = {}  # Track consumed items per map
+        self.is_tracking = self.is_in_map = False
+        self.zone = ""  # zone label of the current map, from MapRules
+        self.last_drop = None  # (item_id, count, value) of the latest pickup
+        self.rolling = RollingMetrics(self.clock())
+        self.map_stats = MapStatsTable()
+
+    def set_status(self, text, color):
+        self.status = (text, color)
+        self.engine.notify(self, "status")
+        self.engine.bus.publish(StatusEvent(self.clock(), self.name, text))
+
+    # ---------- log tailing (I/O thread) ----------
+
+    def poll(self, skip_history=False):
+        """
+        One readiness check: revalidate the log (a single stat) and read only
+        if it grew. Runs on the engine I/O thread.
+
+        skip_history: on the very first attach we start at the end of the
+        file so only the current session is tracked. A log that appears or
+        is recreated later belongs to a new game session and is read from 0.
+        """
+        event = self.discovery.poll()
+        if event == "lost":
+            log.warning("⚠ [%s] Game log lost - waiting for it to come back", self.name)
+            self.waiting_message = "⚠ Game log lost. Waiting for game..."
+            self.engine.dispatch(lambda: self.set_status("⚠ Game log lost. Waiting for game...", 'orange'))
+        elif event is not None:
+            self._attach(event, skip_history)
+
+        if not self.discovery.attached:
+            # Why we are not attached (game closed, logging off...), once per change
+            message = self.discovery.message or self.waiting_message or "⚠ Waiting for game log..."
+            if message != self.waiting_message:
+                self.waiting_message = message
+                self.engine.dispatch(lambda: self.set_status(message, 'orange'))
+            return
+
+        # Index the skipped history first, then rebuild the bag baseline from it
+        if self.index and self.index.indexed < self.log_position:
+            if not self.index.catch_up(self.log_position):
+                return  # more next tick - live lines wait so deltas stay right
+        if self.baseline_until is not None:
+            if not self.reconstruct_baseline(self.baseline_until):
+                return  # more next tick, same as the index catch-up
+            self.baseline_until = None
+
+        if self.discovery.size > self.log_position:
+            self.read_new_log_lines()
+        elif self.held_frame and time.monotonic() - self.held_at >= self.engine.FRAME_GRACE:
+            # A newer line normally closes the frame; a quiet log only after the grace
+            # period, so a frame the game writes across several polls still nets
+            self.flush_held_frame()
+
+    def _attach(self, event, skip_history):
+        self.flush_held_frame()  # belongs to the previous log
+        self._close_baseline()
+        log_path = self.discovery.log_path
+        if self.persist_path:
+            self.engine.settings['log_path'] = log_path
+
+        if event == "attached" and skip_history:
+            # Move to end of file to skip historical data - only track current session
+            log.info("Moving to end of log file (skipping historical data)...")
+            self.log_position = os.path.getsize(log_path)
+            self.baseline_until = self.log_position
+            log.info("✓ Ready to track current session only (historical data ignored)")
+        else:
+            log.info("✓ Log %s, reading from start: %s", event, log_path)
+            self.log_position = 0
+            self.baseline_until = None
+
+        index_dir = self.engine.settings.get('log_index_dir', "log_index")
+        if index_dir:
+            try:
+                self.index = LogIndex(log_path, index_dir)
+                self.index.open()
+            except Exception as e:
+                log.warning("⚠ Log index disabled: %s", e)
+                self.index = None
+
+        self.waiting_message = None
+        self.engine.dispatch(lambda: self.set_status("✓ Game detected! Monitoring pickup events!", '#10b981'))
+        log.info("✓ [%s] Monitoring: %s", self.name, log_path)
+        log.info("✓ Looking for: ItemChange and BagMgr pickup events")
+
+    def read_new_log_lines(self):
+        try:
+            with open(self.discovery.log_path, 'rb') as f:
+                f.seek(self.log_position)
+                data = f.read()
+        except Exception as e:
+            log.error("[ERROR] Read error: %s", e)
+            return
+
+        # Only consume complete lines; a half-written line is read next time
+        complete = data.rfind(b"\n") + 1
+        if not complete:
+            return
+        data = data[:complete]
+        if self.index:
+            self.index.add_lines(data, self.log_position)
+        self.log_position += complete
+
+        # Parse frame by frame, like replay_log, so a bag sort nets out even
+        # when the read split it; the trailing frame waits for the next read
+        frames = list(iter_log_frames((self.held_frame + data.decode('utf-8', errors='ignore'))
+                                      .splitlines(keepends=True)))
+        self.held_frame = frames.pop()
+        self.held_at = time.monotonic()
+        for frame in frames:
+            self.parse_log_text(frame)
+
+    def flush_held_frame(self):
+        if self.held_frame:
+            frame, self.held_frame = self.held_frame, ""
+            self.parse_log_text(frame)
+
+    def reconstruct_baseline(self, until, budget=0.2):
+        """
+        Rebuild the bag contents from the log history skipped at startup, so
+        the first pickup of an item is a real delta and not the whole stack.
+        Only fills slots not already seen live.
+
+        Works for up to `budget` seconds per call and picks up where it left
+        off next time (like LogIndex.catch_up), so a long history never
+        holds up the I/O thread's other clients; True when done.
+        """
+        if self._baseline is None:
+            self._baseline = (BagInventory(),
+                              iter_log_lines(self.discovery.log_path, self.index, (KIND_BAG,), end=until))
+        history, lines = self._baseline
+        deadline = time.time() + budget
+        try:
+            for offset, line in lines:
+                parsed = parse_bag_line(line)
+                if parsed:
+                    history.set(*parsed)
+                if time.time() > deadline:
+                    return False
+        except Exception as e:
+            log.warning("⚠ Could not rebuild bag baseline: %s", e)
+            self._close_baseline()
+            return True
+        self._baseline = None
+        for key, (item_id, count) in history.slots.items():
+            if key not in self.inventory.slots:
+                self.inventory.set(item_id, count, key if isinstance(key, tuple) else None)
+        log.info("✓ [%s] Bag baseline rebuilt from log history (%d items)", self.name, len(history.totals))
+        return True
+
+    def _close_baseline(self):
+        if self._baseline is not None:
+            self._baseline[1].close()  # release the log/index file handles
+            self._baseline = None
+
+    def parse_log_text(self, text):
+        """
+        Parse game log text for map transitions and item pickups/consumption.
+
+        CRITICAL: This function calculates item pickup quantities by tracking
+        the DELTA of each item's total in the bag. The inventory must persist
+        across maps to correctly calculate deltas.
+
+        Logic:
+        - BagMgr line shows: PageId/SlotId, ConfigBaseId = [ITEM_ID], Num = [STACK]
+        - The inventory applies it to that slot and keeps the item's total
+        - delta = item total now - item total before this batch of lines
+        - If delta > 0: Items picked up (add to drops)
+        - If delta < 0: Items consumed (add to map cost)
+
+        Deltas are netted over the text passed in (flushed before each map
+        change and at the end); the tailer and replay_log pass one game frame
+        at a time, so sorting or restacking - the same items moving between
+        slots in one frame - cancels out instead of showing up as a pickup
+        plus a consumption, however the reads split it.
+
+        Map transitions are matched against the engine's MapRules (judged on
+        the next scene only) in line order, so pickups land in the right map.
+        auto_start_map/auto_end_map ignore repeats, so no is_in_map check
+        here - it would be stale while earlier dispatches are still queued.
+        """
+        dispatch = self.engine.dispatch
+        map_rules = self.engine.map_rules
+        inventory = self.inventory
+        before = {}  # item_id -> total before this batch
+
+        def flush():
+            for item_id, old_count in before.items():
+                new_count = inventory.total(item_id)
+                delta = new_count - old_count
+                if delta > 0:
+                    # Items picked up (positive delta)
+                    events_log.debug("[DROP] ID:%s x%d (bag: %d -> %d)", item_id, delta, old_count, new_count)
+                    dispatch(lambda id=item_id, c=delta, n=new_count: self.add_drop(id, c, n))
+                elif delta < 0:
+                    # Items consumed (negative delta)
+                    consumed = abs(delta)
+                    events_log.debug("[CONSUMED] ID:%s x%d (bag: %d -> %d)", item_id, consumed, old_count, new_count)
+                    dispatch(lambda id=item_id, c=consumed, n=new_count: self.add_consumed(id, c, n))
+            before.clear()
+
+        lines = text.split('\n')
+        for line in lines:
+            if "PageApplyBase@ _UpdateGameEnd" in line:
+                flush()  # pickups so far belong to the map being left
+                matched = map_rules.match(line)
+                if matched:
+                    action, zone = matched
+                    if action == "enter":
+                        dispatch(lambda z=zone: self.auto_start_map(z))
+                    elif action == "exit":
+                        dispatch(self.auto_end_map)
+                continue
+
+            # Parse BagMgr events to track item pickups and consumption
+            if 'BagMgr@' in line:
+                try:
+                    parsed = parse_bag_line(line)
+                    if parsed:
+                        item_id, count, slot = parsed
+                        # Remember the totals of every item this line touches (the
+                        # new item and whatever the slot held) before changing them
+                        key = slot if slot is not None else item_id
+                        held = inventory.slots.get(key)
+                        for touched in (item_id, held[0] if held else None):
+                            if touched is not None and touched not in before:
+                                before[touched] = inventory.total(touched)
+
+                        # Update tracking - MUST persist across maps!
+                        inventory.set(item_id, count, slot)
+                except Exception as e:
+                    events_log.error("[ERROR] Failed to parse BagMgr line: %s", e)
+        flush()
+
+    # ---------- state changes (dispatch thread) ----------
+
+    def record_event(self, item_id, delta, bag_count):
+        """Append one inventory change to the engine's event journal"""
+        self.engine.journal.append(self.clock(), item_id, delta,
+                                   bag_count if bag_count is not None else 0,
+                                   self.map_count if self.is_in_map else 0,
+                                   self.engine.sessions.index(self))
+
+    def add_consumed(self, item_id, count, bag_count=None):
+        """Track consumed items and calculate map cost"""
+        self.record_event(item_id, -count, bag_count)
+        item_db = self.engine.item_db
+        if item_id not in item_db:
+            events_log.warning("⚠ Unknown consumed item: %s", item_id)
+            return
+
+        item = item_db[item_id]
+        value = self.engine.item_price(item_id) * count
+
+        # Track consumed items for current map
+        self.consumed_items_current[item_id] = self.consumed_items_current.get(item_id, 0) + count
+
+        # Add to map cost
+        self.current_map_cost += value
+        self.rolling.add(-value, 0, self.clock())
+
+        events_log.info("✓ Consumed: %s x%d = %.2f (total map cost: %.2f)",
+                       item['name'], count, value, self.current_map_cost)
+        self.engine.notify(self, "consumed")
+        self.engine.bus.publish(ConsumeEvent(self.clock(), self.name, item_id, item['name'], count, value,
+                                             self.map_count if self.is_in_map else 0, self.zone))
+
+    def auto_start_map(self, zone=""):
+        if not self.is_in_map:
+            log.info("[MAP] [%s] Entering map (%s)", self.name, zone or "unknown zone")
+            self.zone = zone
+            self.is_in_map = True
+            self.is_tracking = True
+            self.current_time = 0
+            self.current_income = 0  # Don't subtract manual map_cost anymore
+            self.drops_current = {}
+            self.consumed_items_current = {}
+            # BUG FIX: DON'T reset the inventory here!
+            # We need to keep tracking bag counts across maps to calculate proper deltas.
+            # If we reset this, the first pickup in a new map will use the full bag count
+            # instead of just the delta from the previous count.
+            self.current_map_cost = 0.0  # Reset auto-calculated map cost
+            self.map_count += 1
+            self.start_time = self.clock()
+            where = f" - {zone}" if zone else ""
+            self.set_status(f"🗺 Tracking Map #{self.map_count}{where}...", '#10b981')
+            self.engine.notify(self, "map_start")
+            self.engine.bus.publish(MapStartEvent(self.start_time, self.name, self.map_count, zone))
+
+    def auto_end_map(self):
+        if self.is_in_map:
+            log.info("[MAP] [%s] Exiting map", self.name)
+            self.is_in_map = False
+            self.is_tracking = False
+            now = self.clock()
+            elapsed = int(now - self.start_time)
+            self.total_time += elapsed
+
+            # Subtract map cost from total income (so total profit is net)
+            self.total_income -= self.current_map_cost
+
+            # Accumulate total map cost across all maps
+            self.total_map_cost += self.current_map_cost
+
+            # Calculate net profit for this map (before resetting)
+            net_profit = self.current_income - self.current_map_cost
+            map_cost_display = self.current_map_cost
+
+            # Keep the per-map record for distribution stats
+            for table in (self.map_stats, self.engine.map_stats):
+                table.add(self.map_count, elapsed, self.current_income, self.current_map_cost, now, self.zone)
+
+            self.set_status(f"✓ Map done! Profit: {net_profit:.2f} (cost: {map_cost_display:.2f})", '#8b5cf6')
+
+            # Reset current values after accumulating to totals
+            # This ensures "Current" view shows 0 when not in a map
+            self.current_time = 0
+            self.current_income = 0
+            self.current_map_cost = 0.0
+            self.drops_current = {}
+            self.consumed_items_current = {}
+
+            self.engine.notify(self, "map_end")
+            self.engine.bus.publish(MapEndEvent(now, self.name, self.map_count, self.zone, elapsed,
+                                                net_profit + map_cost_display, map_cost_display, net_profit))
+
+    def add_drop(self, item_id, count, bag_count=None):
+        self.record_event(item_id, count, bag_count)
+        item_db = self.engine.item_db
+        if item_id not in item_db:
+            events_log.warning("⚠ Unknown item: %s", item_id)
+            return
+
+        item = item_db[item_id]
+        price = self.engine.item_price(item_id)
+        value = price * count
+
+        self.drops_current[item_id] = self.drops_current.get(item_id, 0) + count
+        self.drops_total[item_id] = self.drops_total.get(item_id, 0) + count
+
+        self.current_income += value
+        self.total_income += value
+        self.rolling.add(value, count, self.clock())
+        self.last_drop = (item_id, count, value)
+
+        # Write to drop_log.txt (tagged with the client name when several are tracked)
+        if self.write_drop_log:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            client = f"[{self.name}] " if len(self.engine.sessions) > 1 else ""
+            try:
+                with open(DROP_LOG, "a", encoding="utf-8") as f:
+                    f.write(f"[{timestamp}] {client}{item['name']} x{count} ({price:.3f})\n")
+                events_log.debug("✓ Logged to drop_log.txt")
+            except Exception as e:
+                log.warning("⚠ Could not write to drop_log.txt: %s", e)
+
+        events_log.info("✓ Added: %s x%d = %.2f", item['name'], count, value)
+        self.engine.notify(self, "drop")
+        self.engine.bus.publish(DropEvent(self.clock(), self.name, item_id, item['name'], count, value,
+                                          self.map_count if self.is_in_map else 0, self.zone))
+        threshold = self.engine.alerts.check(item_id, value)
+        if threshold is not None:
+            self.raise_alert(item_id, item['name'], count, value, threshold)
+
+    def raise_alert(self, item_id, name, count, value, threshold):
+        """Record a high-value drop with its map; listeners and the bus do the rest"""
+        map_number = self.map_count if self.is_in_map else 0
+        alert = DropAlertEvent(self.clock(), self.name, item_id, name, count, value, threshold,
+                               map_number, self.zone)
+        self.engine.alerts.history.append(alert)
+        log.info("★ [%s] High-value drop: %s x%d = %.2f (map %d %s)", self.name, name, count, value,
+                 map_number, self.zone)
+        self.engine.notify(self, "alert")
+        self.engine.bus.publish(alert)
+
+    def elapsed(self):
+        """Seconds in the current map (live while tracking)"""
+        if self.is_tracking:
+            self.current_time = int(self.clock() - self.start_time)
+        return self.current_time
+
+
+class TrackerEngine:
+    """
+    Tails any number of game logs from one I/O thread.
+
+    Each log gets a LogSession with its own bag and map state; the item
+    database and settings are shared. The I/O loop is readiness based: every
+    tick it stats each log and only opens/reads the ones that grew.
+
+    dispatch(fn) decides where state changes run (the GUI passes
+    window.after so they land on the Tk thread); listeners are called
+    as listener(session, event) from that same context.
+    """
+
+    POLL_INTERVAL = 0.5
+    FRAME_GRACE = 4 * POLL_INTERVAL  # how long a trailing frame waits for the rest of its lines
+
+    def __init__(self, settings, item_db=None, dispatch=None, journal_dir=None):
+        self.settings = settings
+        if item_db is None:
+            item_db = load_item_database(bin_path=settings.get('item_catalog'))
+        self.item_db = item_db
+        self.search_index = CatalogIndex()
+        self.search_index.update(self.item_db)
+        self.dispatch = dispatch or (lambda fn: fn())
+        self.sessions = []
+        self.listeners = []
+        self.bus = EventBus()  # typed events for plugins, see EventBus
+        self.running = False
+        self.started = threading.Event()  # set once the first poll has attached the logs
+        self.map_stats = MapStatsTable()  # all clients combined
+        self.map_rules = MapRules(settings.get('map_rules'))
+        self.alerts = DropAlerts(settings.get('drop_alerts'))
+        self.alerts.compile(self.item_db)
+        self.price_feed = PriceFeed.from_settings(self)
+        # Only a live engine spills to (and prunes) journal_dir; replays and
+        # benchmarks keep their events in memory and leave the user's runs alone
+        if journal_dir:
+            EventJournal.prune_runs(journal_dir, settings.get('journal_keep_runs', 5))
+            journal_dir = os.path.join(journal_dir, datetime.now().strftime(JOURNAL_RUN_FORMAT))
+        self.journal = EventJournal(journal_dir, settings.get('journal_memory_events', 65536))
+
+    def add_session(self, name, log_path="", discovery_mode="path", persist_path=False):
+        session = LogSession(self, name, log_path, discovery_mode, persist_path)
+        self.sessions.append(session)
+        return session
+
+    @classmethod
+    def from_settings(cls, settings, item_db=None, dispatch=None, log_path=None):
+        """
+        The live engine: main client from log_path/log_discovery, plus one
+        session per entry in settings['clients'] ({"name": ..., "log_path": ...}),
+        journaling to settings['journal_dir'].
+
+        log_path (e.g. --log) pins the main client to that file for this run
+        only: it is never written into settings, so it can't end up in
+        config.json.
+        """
+        engine = cls(settings, item_db, dispatch, settings.get('journal_dir', "journal"))
+        if log_path:
+            engine.add_session("Main", log_path, "path")
+        else:
+            engine.add_session("Main", settings.get('log_path', ''),
+                               settings.get('log_discovery', 'auto'), persist_path=True)
+        for i, client in enumerate(settings.get('clients', []), 2):
+            engine.add_session(client.get('name') or f"Client {i}", client.get('log_path', ''))
+        return engine
+
+    def get_session(self, name):
+        for session in self.sessions:
+            if session.name == name:
+                return session
+        return None
+
+    def notify(self, session, event):
+        for listener in self.listeners:
+            try:
+                listener(session, event)
+            except Exception as e:
+                log.error("Listener error: %s", e)
+
+    def reload_catalog(self, item_db=None):
+        """
+        Swap in a fresh item database (re-read from disk by default).
+        The search index is refreshed incrementally.
+        """
+        if item_db is None:
+            item_db = load_item_database(bin_path=self.settings.get('item_catalog'))
+        self.item_db = item_db
+        self.search_index.update(self.item_db)
+        self.alerts.compile(self.item_db)
+
+    def reload_alerts(self):
+        """Recompile the drop alert table after settings['drop_alerts'] changed"""
+        self.alerts.compile(self.item_db, self.settings.get('drop_alerts'))
+
+    def merge_prices(self, entries):
+        """
+        Apply changed price-feed entries ({item_id: {"price", ...}}) to the
+        live catalog. Runs on the dispatch thread; unknown items are added.
+        """
+        updated = added = 0
+        for item_id, entry in entries.items():
+            try:
+                price = float(entry["price"])
+            except (TypeError, ValueError):
+                continue
+            if item_id in self.item_db:
+                item = self.item_db[item_id]
+                if item.get("price") == price:
+                    continue
+                self.item_db[item_id] = dict(item, price=price)
+                updated += 1
+            else:
+                self.item_db[item_id] = {"name": entry.get("name", "Unknown"),
+                                         "type": entry.get("type", "Other"), "price": price}
+                added += 1
+        if added:
+            self.search_index.update(self.item_db)
+            self.alerts.compile(self.item_db)  # new items may fall under a type rule
+        if updated or added:
+            log.info("✓ Price feed: %d prices updated, %d new items", updated, added)
+            self.notify(None, "prices")
+
+    def item_price(self, item_id):
+        price = self.item_db[item_id]['price']
+        if self.settings['apply_tax'] and item_id != "100300":
+            price = price * 0.875
+        return price
+
+    # ---------- I/O loop ----------
+
+    def poll_once(self, skip_history=False):
+        for session in self.sessions:
+            try:
+                session.poll(skip_history)
+            except Exception as e:
+                log.error("Monitor error [%s]: %s", session.name, e)
+
+    def start(self):
+        self.running = True
+
+        def io_loop():
+            # The first poll (discovery, index catch-up, baseline rebuild) runs
+            # here too, never on the caller's thread - the Tk or asyncio loop
+            self.poll_once(skip_history=True)
+            self.started.set()
+            while self.running:
+                time.sleep(self.POLL_INTERVAL)
+                self.poll_once()
+        threading.Thread(target=io_loop, daemon=True).start()
+        log.info("✓ Log monitor thread started (%d log(s))", len(self.sessions))
+        if self.price_feed:
+            self.price_feed.start()
+
+    def stop(self):
+        self.running = False
+        if self.price_feed:
+            self.price_feed.stop()
+
+    # ---------- views ----------
+
+    def is_tracking(self, session=None):
+        sessions = [session] if session else self.sessions
+        return any(s.is_tracking for s in sessions)
+
+    def snapshot(self, session=None):
+        """
+        Plain-dict view of one client, or of all clients combined when
+        session is None. Combined times are wall-clock (the longest running
+        client), so /min figures are for the whole machine.
+        """
+        sessions = [session] if session else self.sessions
+        snap = {
+            "current_time": 0, "total_time": 0,
+            "current_income": 0, "total_income": 0,
+            "current_map_cost": 0.0, "total_map_cost": 0.0,
+            "map_count": 0, "is_tracking": False,
+            "drops_current": {}, "drops_total": {},
+            "rolling": {minutes: None for minutes in ROLLING_WINDOWS},
+        }
+        for s in sessions:
+            # Per-minute rates of concurrent clients add up
+            for minutes, rate in s.rolling.rates(s.clock()).items():
+                if rate is None:
+                    continue
+                total_profit, total_drops = snap["rolling"][minutes] or (0.0, 0.0)
+                snap["rolling"][minutes] = (total_profit + rate[0], total_drops + rate[1])
+            current_time = s.elapsed()
+            snap["current_time"] = max(snap["current_time"], current_time)
+            snap["total_time"] = max(snap["total_time"],
+                                     s.total_time + (current_time if s.is_tracking else 0))
+            snap["current_income"] += s.current_income
+            snap["total_income"] += s.total_income
+            snap["current_map_cost"] += s.current_map_cost
+            snap["total_map_cost"] += s.total_map_cost
+            snap["map_count"] += s.map_count
+            snap["is_tracking"] = snap["is_tracking"] or s.is_tracking
+            for key in ("drops_current", "drops_total"):
+                merged = snap[key]
+                for item_id, count in getattr(s, key).items():
+                    merged[item_id] = merged.get(item_id, 0) + count
+        return snap
+
+    def map_summary(self, session=None):
+        """Per-map distribution stats for one client, or all combined, plus per-zone totals"""
+        table = session.map_stats if session else self.map_stats
+        summary = table.summary()
+        summary["zones"] = table.zones()
+        return summary
+
+    def reset_all(self):
+        self.map_stats = MapStatsTable()
+        for session in self.sessions:
+            session.reset()
+        log.info("✓ Data reset - statistics cleared, inventory tracking maintained")
+
+
+# ==================== REPLAY ====================
+
+def replay_log(log_path, settings=None, item_db=None):
+    """
+    Re-run a whole log through the tracker and return the engine, e.g. to
+    regenerate a report. Uses (and builds, the first time) the sidecar
+    index, so only the relevant lines are read; gzip/zstd archived logs
+    are decompressed on the fly instead. Nothing is written to
+    drop_log.txt. The session runs on the log's own timestamps, so map
+    durations and profit/min are game time, as when tailed live.
+    """
+    settings = settings if settings is not None else default_settings()
+    engine = TrackerEngine(settings, item_db)
+    session = engine.add_session("Replay", log_path, "path")
+    session.write_drop_log = False
+
+    index = None
+    compression = log_compression(log_path)
+    if compression:
+        # Offsets into an archive can't be seeked to - stream it instead
+        log.info("✓ Replaying %s archive %s as a stream", compression, os.path.basename(log_path))
+    elif settings.get('log_index_dir', "log_index"):
+        try:
+            index = LogIndex(log_path, settings.get('log_index_dir', "log_index"))
+            index.open()
+            index.catch_up(os.path.getsize(log_path), budget=float("inf"))
+        except Exception as e:
+            log.warning("⚠ Replaying without index: %s", e)
+            index = None
+
+    game_time = 0.0
+    session.clock = lambda: game_time
+
+    # Feed one game frame (lines sharing a timestamp) at a time: the same
+    # netting window a sort or restack gets when tailed live
+    for frame in iter_log_frames(line for offset, line in iter_log_lines(log_path, index)):
+        stamp = log_line_timestamp(frame)
+        if stamp and not game_time:
+            session.rolling = RollingMetrics(stamp)  # warm-up counts from the log's start
+        game_time = stamp or game_time
+        session.parse_log_text(frame)
+    if index:
+        index.close()
+    return engine
+
+
+# ==================== HEADLESS SERVER ====================
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_MAX_FRAME = 4096  # clients only send pings/close; anything bigger drops the connection
+
+OVERLAY_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>FE Infinite</title>
+<style>body{font:16px Arial;color:#fff;background:transparent;text-shadow:0 0 3px #000}
+.big{font-size:28px;font-weight:bold}
+#alert{color:#f59e0b;font-weight:bold;visibility:hidden}
+#alert.on{visibility:visible;animation:blink .25s 8 alternate}
+@keyframes blink{to{opacity:.2}}</style></head>
+<body><div class="big" id="profit">-</div><div id="info">connecting...</div><div id="alert"></div>
+<script>
+var state = {}, seenAlert = null;
+function flash(a) {
+  var el = document.getElementById("alert");
+  el.textContent = "\u2605 " + a.name + " x" + a.count + " = " + a.value.toFixed(0);
+  el.className = "";
+  void el.offsetWidth;  // restart the animation
+  el.className = "on";
+  clearTimeout(flash.timer);
+  flash.timer = setTimeout(function () { el.className = ""; }, 5000);
+}
+function merge(changes) {
+  for (var k in changes) {
+    var v = changes[k];
+    if (v && typeof v === "object" && state[k] && typeof state[k] === "object") {
+      for (var j in v) { if (v[j] === null) delete state[k][j]; else state[k][j] = v[j]; }
+    } else state[k] = v;
+  }
+}
+function connect() {
+  var ws = new WebSocket("ws://" + location.host + "/ws" + location.search);
+  ws.onmessage = function (e) {
+    var msg = JSON.parse(e.data);
+    if (msg.type === "full") {
+      state = msg.state;
+      seenAlert = state.last_alert ? state.last_alert.ts : null;  // don't replay old alerts
+    } else merge(msg.changes);
+    if (state.last_alert && state.last_alert.ts !== seenAlert) {
+      seenAlert = state.last_alert.ts;
+      flash(state.last_alert);
+    }
+    document.getElementById("profit").textContent = "Profit: " + state.total_profit.toFixed(2);
+    document.getElementById("info").textContent = "Maps: " + state.map_count +
+      "  |  5m: " + (state.rolling["5m"] ? state.rolling["5m"].profit_per_min.toFixed(1) : "-") + "/min";
+  };
+  ws.onclose = function () { setTimeout(connect, 2000); };
+}
+connect();
+</script></body></html>
+"""
+
+
+def _diff_state(old, new):
+    """
+    Top-level keys whose value changed. Dict values (drops, rolling...) are
+    diffed one level deep; keys that disappeared are sent as null.
+    """
+    changes = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if previous == value:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            sub = {k: v for k, v in value.items() if previous.get(k) != v}
+            sub.update({k: None for k in previous if k not in value})
+            changes[key] = sub
+        else:
+            changes[key] = value
+    return changes
+
+
+class StatsServer:
+    """
+    Serves the engine state over HTTP and WebSocket from one asyncio thread.
+
+    HTTP:  GET /stats[?client=NAME]  current state as JSON
+           GET /maps[?client=NAME]   per-map distribution stats
+           GET /bus                  event bus subscribers: depth, lag, drops
+           GET /                     minimal overlay page (OBS browser source)
+    WS:    /ws[?client=NAME]         {"type": "full", "state": {...}} on
+           connect, then {"type": "delta", "seq": n, "changes": {...}} at
+           most `rate` times per second (see _diff_state for the merge rule)
+
+    Engine state changes are dispatched onto this loop (the headless
+    equivalent of window.after), so reads never race the I/O thread.
+    Each tick builds and encodes one payload per view in use and writes the
+    same bytes to every subscriber. A client whose socket backs up is
+    skipped and gets a fresh full state once it drains.
+    """
+
+    MAX_BUFFERED = 256 * 1024  # bytes queued to one client before it's skipped
+
+    def __init__(self, engine, host="127.0.0.1", port=8765, rate=2.0):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / max(rate, 0.1)
+        self.loop = None
+        self.ws_clients = {}  # writer -> view name ("All" or a client name)
+        self._stale = set()  # writers that missed a delta
+        self._last_states = {}  # view -> last state sent
+        self._seq = 0
+        self._dirty = True
+        engine.dispatch = self.dispatch
+        engine.listeners.append(lambda session, event: self._mark_dirty())
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    def dispatch(self, fn):
+        self.loop.call_soon_threadsafe(fn)
+
+    def state(self, view="All"):
+        session = self.engine.get_session(view)
+        snap = self.engine.snapshot(session)
+        state = {
+            "client": session.name if session else "All",
+            "current_time": snap["current_time"],
+            "total_time": snap["total_time"],
+            "current_income": round(snap["current_income"], 3),
+            "current_map_cost": round(snap["current_map_cost"], 3),
+            "current_profit": round(snap["current_income"] - snap["current_map_cost"], 3),
+            "total_map_cost": round(snap["total_map_cost"], 3),
+            "total_profit": round(snap["total_income"], 3),  # total is already net of map cost
+            "map_count": snap["map_count"],
+            "is_tracking": snap["is_tracking"],
+            "rolling": {f"{m}m": rate and {"profit_per_min": round(rate[0], 3),
+                                           "drops_per_min": round(rate[1], 3)}
+                        for m, rate in snap["rolling"].items()},
+            "drops_current": snap["drops_current"],
+            "drops_total": snap["drops_total"],
+            "items": {item_id: self.engine.item_db[item_id]["name"]
+                      for item_id in snap["drops_total"] if item_id in self.engine.item_db},
+        }
+        alerts = self.engine.alerts.recent(session.name if session else None)
+        state["last_alert"] = alerts[-1]._asdict() if alerts else None
+        if session is None and len(self.engine.sessions) > 1:
+            state["clients"] = [s.name for s in self.engine.sessions]
+        return state
+
+    # ---------- lifecycle ----------
+
+    def run(self):
+        """Blocking: start the engine and serve until interrupted"""
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.engine.start()
+        log.info("✓ Stats server on http://%s:%d (ws://%s:%d/ws)", self.host, self.port, self.host, self.port)
+        async with server:
+            await self._broadcast_loop()
+
+    async def _broadcast_loop(self):
+        while self.engine.running:
+            await asyncio.sleep(self.interval)
+            # Time-based fields keep moving while a map is tracked
+            if not self.ws_clients or not (self._dirty or self.engine.is_tracking()):
+                continue
+            self._dirty = False
+            self._broadcast()
+
+    def _broadcast(self):
+        self._seq += 1
+        frames = {}
+        for view in set(self.ws_clients.values()):
+            state = self.state(view)
+            changes = _diff_state(self._last_states.get(view, {}), state)
+            self._last_states[view] = state
+            delta = {"type": "delta", "seq": self._seq, "changes": changes} if changes else None
+            frames[view] = (state, delta and self._ws_frame(json.dumps(delta)))
+
+        for writer, view in list(self.ws_clients.items()):
+            state, frame = frames[view]
+            if writer.transport.get_write_buffer_size() > self.MAX_BUFFERED:
+                self._stale.add(writer)
+                continue
+            if writer in self._stale:
+                self._stale.discard(writer)
+                self._send_full(writer, state)
+            elif frame:
+                writer.write(frame)
+
+    def _send_full(self, writer, state):
+        writer.write(self._ws_frame(json.dumps({"type": "full", "seq": self._seq, "state": state})))
+
+    # ---------- HTTP ----------
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        lines = request.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        target = parts[1] if len(parts) > 1 else "/"
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        path, _, query = target.partition("?")
+        view = parse_qs(query).get("client", ["All"])[0]  # percent-decoded: ?client=Client%202
+
+        if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+            await self._handle_ws(reader, writer, headers, view)
+            return
+
+        if path == "/stats":
+            self._respond(writer, "200 OK", "application/json", json.dumps(self.state(view)))
+        elif path == "/maps":
+            summary = self.engine.map_summary(self.engine.get_session(view))
+            self._respond(writer, "200 OK", "application/json", json.dumps(summary))
+        elif path == "/alerts":
+            session = self.engine.get_session(view)
+            alerts = self.engine.alerts.recent(session.name if session else None)
+            self._respond(writer, "200 OK", "application/json", json.dumps([a._asdict() for a in alerts]))
+        elif path == "/bus":
+            self._respond(writer, "200 OK", "application/json", json.dumps(self.engine.bus.stats()))
+        elif path == "/":
+            self._respond(writer, "200 OK", "text/html; charset=utf-8", OVERLAY_HTML)
+        else:
+            self._respond(writer, "404 Not Found", "text/plain", "not found")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    @staticmethod
+    def _respond(writer, status, content_type, body):
+        body = body.encode("utf-8")
+        writer.write((f"HTTP/1.1 {status}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      "Access-Control-Allow-Origin: *\r\n"
+                      "Cache-Control: no-store\r\n"
+                      "Connection: close\r\n\r\n").encode("latin-1") + body)
+
+    # ---------- WebSocket (RFC 6455, server side) ----------
+
+    async def _handle_ws(self, reader, writer, headers, view):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1"))
+
+        state = self.state(view)
+        self._send_full(writer, state)
+        self._last_states.setdefault(view, state)  # deltas only need to be newer than this
+        self.ws_clients[writer] = view
+        try:
+            # We only push; read to answer pings and notice the close
+            while True:
+                opcode, payload = await self._read_ws_frame(reader)
+                if opcode == 0x8:
+                    writer.write(self._ws_frame(payload, opcode=0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(self._ws_frame(payload, opcode=0xA))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.ws_clients.pop(writer, None)
+            self._stale.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_ws_frame(reader):
+        head = await reader.readexactly(2)
+        opcode = head[0] & 0x0F
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await reader.readexactly(8))[0]
+        if length > WS_MAX_FRAME:
+            raise ConnectionError(f"WebSocket frame of {length} bytes")  # the server may face a LAN
+        mask = await reader.readexactly(4) if head[1] & 0x80 else b""
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    @staticmethod
+    def _ws_frame(data, opcode=0x1):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        length = len(data)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        return header + data
+
+
+def run_headless(settings, host=None, port=None, rate=None, log_path=None):
+    """Run the tracker without a window, serving stats over HTTP/WebSocket"""
+    engine = TrackerEngine.from_settings(settings, log_path=log_path)
+    server = StatsServer(engine,
+                         host or settings.get('server_host', "127.0.0.1"),
+                         port or settings.get('server_port', 8765),
+                         rate or settings.get('server_rate', 2.0))
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+
+
+# ==================== PROFIT CHART ====================
+
+def lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of at most `threshold` points that keep the shape.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    indices = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third triangle vertex
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        count = next_end - next_start
+        avg_x = sum(xs[j] for j in range(next_start, next_end)) / count
+        avg_y = sum(ys[j] for j in range(next_start, next_end)) / count
+
+        best, best_area = start, -1.0
+        ax, ay = xs[a], ys[a]
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        a = best
+    indices.append(n - 1)
+    return indices
+
+
+class ProfitHistory:
+    """
+    Session profit over time, for the chart: cumulative net profit and the
+    5-minute rolling profit/min, sampled at most once per second (flat
+    stretches are only re-sampled every 30s), plus map boundaries and big
+    drops. Kept for the whole run whether or not the chart is open.
+    """
+
+    IDLE_SAMPLE = 30.0
+
+    def __init__(self):
+        self.t = array('d')
+        self.profit = array('d')
+        self.rolling = array('d')
+        self.map_starts = array('d')
+        self.big_drops = []  # (t, profit, label) - rare by definition
+
+    def sample(self, now, profit, rolling):
+        if self.t:
+            last = len(self.t) - 1
+            if now - self.t[last] < 1.0:
+                return False
+            if (profit == self.profit[last] and rolling == self.rolling[last]
+                    and now - self.t[last] < self.IDLE_SAMPLE):
+                return False
+        self.t.append(now)
+        self.profit.append(profit)
+        self.rolling.append(rolling)
+        return True
+
+
+class ProfitChart:
+    """
+    Tk canvas chart of a ProfitHistory.
+
+    The x axis spans a fixed window that doubles when the session outgrows
+    it, and the y range gets 50% headroom when exceeded, so full redraws
+    happen O(log n) times. A full redraw runs LTTB down to the plot width;
+    in between, each finished pixel column adds one short segment (the
+    sample of that column with the largest triangle against the last drawn
+    point and the newest sample - a streaming LTTB). Canvas work therefore
+    stays around one item per pixel column, for 10 minutes or 10 hours.
+    """
+
+    WIDTH, HEIGHT = 640, 300
+    LEFT, RIGHT, TOP, BOTTOM = 55, 55, 15, 25
+    INITIAL_SPAN = 600.0
+
+    def __init__(self, parent, history):
+        self.history = history
+        self.window = tk.Toplevel(parent)
+        self.window.title("Profit Chart")
+        self.window.attributes('-topmost', True)
+        self.canvas = tk.Canvas(self.window, width=self.WIDTH, height=self.HEIGHT, bg='#111827',
+                                highlightthickness=0)
+        self.canvas.pack()
+        ttk.Label(self.window, text="━ cumulative profit   ━ 5m profit/min   ┆ map start   ● big drop",
+                  foreground='gray').pack(pady=3)
+        self.plot_w = self.WIDTH - self.LEFT - self.RIGHT
+        self.plot_h = self.HEIGHT - self.TOP - self.BOTTOM
+        self.redraw()
+
+    def exists(self):
+        return self.window.winfo_exists()
+
+    # ---------- scales ----------
+
+    def _fit(self):
+        h = self.history
+        self.t0 = h.t[0] if h.t else time.time()
+        span = self.INITIAL_SPAN
+        while h.t and h.t[len(h.t) - 1] - self.t0 > span:
+            span *= 2
+        self.span = span
+        self.p_lo, self.p_hi = self._range(h.profit)
+        self.r_lo, self.r_hi = self._range(h.rolling)
+
+    @staticmethod
+    def _range(values):
+        lo = min(min(values, default=0.0), 0.0)
+        hi = max(max(values, default=0.0), 1.0)
+        pad = (hi - lo) * 0.5
+        return lo - (pad if lo < 0 else 0), hi + pad
+
+    def _x(self, t):
+        return self.LEFT + (t - self.t0) / self.span * self.plot_w
+
+    def _y(self, v, lo, hi):
+        return self.TOP + self.plot_h - (v - lo) / (hi - lo) * self.plot_h
+
+    def _fits(self, i):
+        h = self.history
+        return (h.t[i] - self.t0 <= self.span and self.p_lo <= h.profit[i] <= self.p_hi
+                and self.r_lo <= h.rolling[i] <= self.r_hi)
+
+    # ---------- drawing ----------
+
+    def _series(self):
+        h = self.history
+        return ((h.profit, self.p_lo, self.p_hi, '#10b981', 2),
+                (h.rolling, self.r_lo, self.r_hi, '#a78bfa', 1))
+
+    def redraw(self):
+        h = self.history
+        c = self.canvas
+        c.delete("all")
+        self._fit()
+
+        # Axes and labels
+        c.create_rectangle(self.LEFT, self.TOP, self.LEFT + self.plot_w, self.TOP + self.plot_h, outline='#374151')
+        c.create_text(self.LEFT - 5, self.TOP, text=f"{self.p_hi:.0f}", anchor=tk.NE, fill='#10b981')
+        c.create_text(self.LEFT - 5, self.TOP + self.plot_h, text=f"{self.p_lo:.0f}", anchor=tk.SE, fill='#10b981')
+        c.create_text(self.WIDTH - self.RIGHT + 5, self.TOP, text=f"{self.r_hi:.0f}/m", anchor=tk.NW, fill='#a78bfa')
+        c.create_text(self.WIDTH - self.RIGHT + 5, self.TOP + self.plot_h, text=f"{self.r_lo:.0f}/m",
+                      anchor=tk.SW, fill='#a78bfa')
+        c.create_text(self.LEFT + self.plot_w, self.HEIGHT - 5, text=f"{self.span / 60:.0f} min",
+                      anchor=tk.SE, fill='gray')
+        zero = self._y(0.0, self.p_lo, self.p_hi)
+        c.create_line(self.LEFT, zero, self.LEFT + self.plot_w, zero, fill='#374151', dash=(2, 4))
+
+        for t in h.map_starts:
+            self._draw_map_start(t)
+        for t, profit, label in h.big_drops:
+            self._draw_big_drop(t, profit, label)
+
+        n = len(h.t)
+        self._last = None  # last drawn sample index
+        self._pending = []  # samples in the unfinished pixel column
+        if n:
+            for values, lo, hi, color, width in self._series():
+                coords = []
+                for i in lttb(h.t, values, self.plot_w):
+                    coords += (self._x(h.t[i]), self._y(values[i], lo, hi))
+                if len(coords) >= 4:
+                    c.create_line(*coords, fill=color, width=width)
+            self._last = n - 1
+        self._drawn = n
+
+    def append(self):
+        """Draw samples added since the last call; full redraw only when a scale changes"""
+        h = self.history
+        n = len(h.t)
+        for i in range(self._drawn, n):
+            if not self._fits(i):
+                self.redraw()
+                return
+            if self._last is None:
+                self._last = i
+                continue
+            # Flush only when the pixel column changes: _last is in the previous one
+            if self._pending and int(self._x(h.t[i])) > int(self._x(h.t[self._pending[0]])):
+                self._draw_column(i)
+            self._pending.append(i)
+        self._drawn = n
+
+    def _draw_column(self, newest):
+        """Finish a pixel column: draw through its most significant sample"""
+        h = self.history
+        a, pending, last = self._last, self._pending, self._pending[-1]
+        for values, lo, hi, color, width in self._series():
+            ax, ay = h.t[a], values[a]
+            cx, cy = h.t[newest], values[newest]
+            best = max(pending, key=lambda j: abs((ax - cx) * (values[j] - ay) - (ax - h.t[j]) * (cy - ay)))
+            coords = []
+            for j in [a, best] + ([last] if last != best else []):
+                coords += (self._x(h.t[j]), self._y(values[j], lo, hi))
+            self.canvas.create_line(*coords, fill=color, width=width)
+        self._last = last
+        self._pending = []
+
+    def _draw_map_start(self, t):
+        if t - self.t0 <= self.span:
+            x = self._x(max(t, self.t0))
+            self.canvas.create_line(x, self.TOP, x, self.TOP + self.plot_h, fill='#4b5563', dash=(1, 3))
+
+    def _draw_big_drop(self, t, profit, label):
+        if t - self.t0 <= self.span and self.p_lo <= profit <= self.p_hi:
+            x, y = self._x(max(t, self.t0)), self._y(profit, self.p_lo, self.p_hi)
+            self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill='#f59e0b', outline='')
+            self.canvas.create_text(x, y - 6, text=label, anchor=tk.S, fill='#f59e0b', font=('Arial', 8))
+
+    def add_map_start(self, t):
+        self._draw_map_start(t)
+
+    def add_big_drop(self, t, profit, label):
+        self._draw_big_drop(t, profit, label)
+
+
+# ==================== DROP LOG VIEWER ====================
+
+DROP_LOG = "drop_log.txt"
+DROP_LOG_TIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}( \d{2}:\d{2}(:\d{2})?)?$|\d{2}:\d{2}(:\d{2})?$")
+
+
+class DropLogIndex:
+    """
+    Random access to the lines of an ever-growing drop_log.txt.
+
+    The file is memory-mapped and cut into blocks of about BLOCK bytes that
+    end on a line break; only each block's byte offset and first line
+    number are kept (16 bytes per 16 KB), counted with bytes.count at C
+    speed. Line n is found by bisecting the blocks and scanning at most one
+    block, so memory and the cost of showing a screen of lines do not
+    depend on the file size. build() and filter_step() do bounded slices of
+    work and are meant for a background thread; every method takes the lock.
+    """
+
+    BLOCK = 16384
+    STEP_BLOCKS = 1024  # blocks indexed per build() call (~16 MB)
+    FILTER_CHUNK = 4 << 20
+
+    def __init__(self, path=DROP_LOG):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mm = None
+        self.size = 0
+        self.closed = False
+        self._reset()
+
+    def _reset(self):
+        self.block_offsets = array('Q')
+        self.block_lines = array('Q')
+        self.indexed = 0  # bytes covered by complete, counted lines
+        self.line_count = 0
+        self.set_filter_locked(None)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.mm:
+                self.mm.close()
+                self.mm = None
+
+    def refresh(self):
+        """Remap if the file grew (start over if it shrank). True if anything changed."""
+        with self.lock:
+            if self.closed:
+                return False
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size == self.size:
+                return False
+            if size < self.size:
+                self._reset()
+            if self.mm:
+                self.mm.close()
+                self.mm = None
+            if size:
+                with open(self.path, "rb") as f:
+                    self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = len(self.mm) if self.mm else 0
+            return True
+
+    def progress(self):
+        return self.indexed / self.size if self.size else 1.0
+
+    # ---------- line index ----------
+
+    def build(self):
+        """Index the next slice of complete lines. True while more remains."""
+        with self.lock:
+            mm = self.mm
+            for _ in range(self.STEP_BLOCKS):
+                if not mm or self.indexed >= self.size:
+                    return False
+                if not self.block_offsets or self.indexed - self.block_offsets[-1] >= self.BLOCK:
+                    self.block_offsets.append(self.indexed)
+                    self.block_lines.append(self.line_count)
+                # End the block at the first line break past its byte budget
+                budget = min(self.block_offsets[-1] + self.BLOCK, self.size)
+                nl = mm.find(b"\n", max(budget - 1, self.indexed), self.size)
+                if nl < 0:
+                    nl = mm.rfind(b"\n", self.indexed, self.size)
+                    if nl < 0:
+                        return False  # only a half-written line left
+                self.line_count += mm[self.indexed:nl + 1].count(b"\n")  # mmap.count is 3.13+
+                self.indexed = nl + 1
+            return self.indexed < self.size
+
+    def _offset_of(self, n):
+        b = bisect_left(self.block_lines, n + 1) - 1
+        pos = self.block_offsets[b]
+        for _ in range(n - self.block_lines[b]):
+            pos = self.mm.find(b"\n", pos) + 1
+        return pos
+
+    def _line_at(self, pos):
+        end = self.mm.find(b"\n", pos, self.indexed)
+        return self.mm[pos:end].decode("utf-8", errors="replace").rstrip("\r")
+
+    def lines(self, start, count):
+        """Lines start..start+count-1 of the file (or of the filter matches)"""
+        with self.lock:
+            if self.pattern is not None:
+                end = min(start + count, len(self.matches))
+                return [self._line_at(self.matches[i]) for i in range(start, end)]
+            end = min(start + count, self.line_count)
+            if start >= end:
+                return []
+            result = []
+            pos = self._offset_of(start)
+            for _ in range(end - start):
+                nl = self.mm.find(b"\n", pos, self.indexed)
+                result.append(self.mm[pos:nl].decode("utf-8", errors="replace").rstrip("\r"))
+                pos = nl + 1
+            return result
+
+    def total(self):
+        """Number of rows in the current view"""
+        return len(self.matches) if self.pattern is not None else self.line_count
+
+    def find_time(self, stamp):
+        """
+        Row of the first line logged at or after stamp ("YYYY-mm-dd HH:MM:SS"
+        prefix). Lines are appended in time order, so this is a binary search
+        over the blocks plus a scan of one block.
+        """
+        key = stamp.encode()
+        with self.lock:
+            if not self.line_count:
+                return 0
+
+            def stamp_at(pos):
+                return self.mm[pos + 1:pos + 1 + len(key)]
+
+            if self.pattern is not None:
+                lo, hi = 0, len(self.matches)
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if stamp_at(self.matches[mid]) < key:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                return lo
+
+            lo, hi = 0, len(self.block_offsets)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if stamp_at(self.block_offsets[mid]) < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            b = max(lo - 1, 0)
+            n, pos = self.block_lines[b], self.block_offsets[b]
+            while n < self.line_count and stamp_at(pos) < key:
+                pos = self.mm.find(b"\n", pos) + 1
+                n += 1
+            return n
+
+    def last_date(self):
+        with self.lock:
+            if not self.line_count:
+                return datetime.now().strftime("%Y-%m-%d")
+            start = self.mm.rfind(b"\n", 0, self.indexed - 1) + 1
+            return self.mm[start + 1:start + 11].decode("ascii", errors="replace")
 
-            for key in keys:
-                if not key or current_node is None:
-                    continue
-                if not isinstance(current_node, dict):
-                    break
-                if key not in current_node:
-                    current_node[key] = {}
-                current_node = current_node[key]
-                if current_node is None:
-                    break
+    # ---------- filter ----------
 
-            stack.append(current_node)
+    def set_filter(self, text):
+        """Show only lines containing text (case-insensitive); None/"" = all"""
+        with self.lock:
+            self.set_filter_locked(text)
 
-    return root
+    def set_filter_locked(self, text):
+        self.pattern = text.lower().encode("utf-8") if text else None
+        self.matches = array('Q')  # start offsets of the matching lines
+        self.filter_pos = 0
 
+    def filter_step(self):
+        """Scan the next chunk of indexed lines for the filter. True while more remains."""
+        with self.lock:
+            if self.pattern is None or self.filter_pos >= self.indexed:
+                return False
+            mm, pos = self.mm, self.filter_pos
+            end = mm.find(b"\n", min(pos + self.FILTER_CHUNK, self.indexed) - 1, self.indexed) + 1
+            # bytes.lower() only folds ASCII, which is what item names need
+            chunk = mm[pos:end].lower()
+            i = chunk.find(self.pattern)
+            while i >= 0:
+                start = chunk.rfind(b"\n", 0, i) + 1
+                self.matches.append(pos + start)
+                i = chunk.find(self.pattern, chunk.find(b"\n", i) + 1)
+            self.filter_pos = end
+            return end < self.indexed
 
 
-def scan_log_for_pickups(log_text):
+class DropLogViewer:
     """
-    DEPRECATED: This function is NOT used in the actual log monitoring.
-    The real parsing happens in parse_log_text() method which correctly
-    calculates deltas using previous_bag_counts tracking.
-    
-    This function is kept for backwards compatibility but should not be called.
+    Window over a DropLogIndex. The listbox only ever holds the rows on
+    screen; the scrollbar is driven by hand against the total row count, so
+    a 1 GB log opens as fast as a 1 MB one. A background thread keeps
+    indexing (and follows the file while the view is at the bottom).
     """
-    print("⚠ WARNING: scan_log_for_pickups() called but is deprecated!")
-    return []
 
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, parent, path=DROP_LOG):
+        self.index = DropLogIndex(path)
+        self.top = 0
+        self.rows = 25
+        self.follow = True  # stick to the newest line while at the bottom
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Drop Log - {path}")
+        self.window.geometry("620x480")
+        self.window.attributes('-topmost', True)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
 
+        bar = ttk.Frame(self.window)
+        bar.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Label(bar, text="🔍 Item").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self._refilter())
+        ttk.Entry(bar, textvariable=self.filter_var, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Label(bar, text="Jump to").pack(side=tk.LEFT, padx=(10, 0))
+        self.time_var = tk.StringVar()
+        time_entry = ttk.Entry(bar, textvariable=self.time_var, width=17)
+        time_entry.pack(side=tk.LEFT, padx=5)
+        time_entry.bind("<Return>", lambda e: self.jump_to_time())
+        ttk.Button(bar, text="Go", command=self.jump_to_time, width=4).pack(side=tk.LEFT)
 
-def parse_pickup_events(log_text):
-    """
-    Parse pickup events from new log format.
-    Returns list of (item_id, count) tuples.
-    """
-    return scan_log_for_pickups(log_text)
+        frame = ttk.Frame(self.window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.scrollbar = ttk.Scrollbar(frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(frame, font=('Consolas', 10), activestyle='none')
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))
+        for key, delta in (("<Prior>", -1), ("<Next>", 1)):
+            self.listbox.bind(key, lambda e, d=delta: self.scroll(d * self.rows))
+        self.listbox.bind("<Home>", lambda e: self.goto(0))
+        self.listbox.bind("<End>", lambda e: self.goto(self.index.total()))
+
+        self.lbl_status = ttk.Label(self.window, text="", foreground='gray')
+        self.lbl_status.pack(pady=(0, 5))
+
+        self.running = True
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def exists(self):
+        return self.running and self.window.winfo_exists()
+
+    def close(self):
+        self.running = False
+        self.window.destroy()
+        self.index.close()
+
+    def _worker(self):
+        while self.running:
+            changed = self.index.refresh()
+            busy = self.index.build()
+            busy = self.index.filter_step() or busy
+            if (changed or busy) and self.running:
+                try:
+                    self.window.after(0, self.render)
+                except (RuntimeError, tk.TclError):
+                    break  # window gone
+            if not busy:
+                time.sleep(self.POLL_INTERVAL)
+
+    # ---------- view ----------
+
+    def _on_resize(self, event):
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self.rows = max(1, event.height // line_height)
+        self.render()
+
+    def _on_scrollbar(self, *args):
+        total = self.index.total()
+        if args[0] == "moveto":
+            self.goto(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.rows if args[2] == "pages" else 1)
+            self.scroll(step)
+
+    def scroll(self, delta):
+        self.goto(self.top + delta)
+
+    def goto(self, row):
+        total = self.index.total()
+        self.top = max(0, min(row, total - self.rows))
+        self.follow = self.top >= total - self.rows
+        self.render()
+
+    def render(self):
+        if not self.exists():
+            return
+        total = self.index.total()
+        if self.follow:
+            self.top = max(0, total - self.rows)
+        self.listbox.delete(0, tk.END)
+        for line in self.index.lines(self.top, self.rows):
+            self.listbox.insert(tk.END, line)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        status = f"{total:,} lines" if self.index.pattern is None else f"{total:,} matching lines"
+        if self.index.progress() < 1.0:
+            status += f"   (indexing {self.index.progress():.0%})"
+        self.lbl_status.config(text=status)
+
+    def _refilter(self):
+        self.index.set_filter(self.filter_var.get().strip())
+        self.top = 0
+        self.follow = True
+        self.render()
+
+    def jump_to_time(self):
+        text = self.time_var.get().strip()
+        if not DROP_LOG_TIME_RE.match(text):
+            self.lbl_status.config(text="Time format: HH:MM[:SS] or YYYY-mm-dd [HH:MM[:SS]]")
+            return
+        if ":" in text and "-" not in text:
+            text = f"{self.index.last_date()} {text}"  # time only = the latest day in the log
+        self.goto(self.index.find_time(text))
 
 
 class FurTorchV5:
-    def __init__(self):
+    def __init__(self, log_path=None):
         self.window = tk.Tk()
         self.window.title("FE Infinite - by FurTorch")
-        self.window.geometry("550x420")
+        self.window.geometry("550x470")
         self.window.resizable(False, False)
 
-        # State
-        self.is_tracking = False
-        self.is_in_map = False
-        self.current_time = 0
-        self.total_time = 0
-        self.current_income = 0
-        self.total_income = 0
-        self.map_count = 0
-        self.drops_current = {}
-        self.drops_total = {}
         self.view_mode = "current"
-        self.start_time = time.time()
-
-        # Map cost tracking
-        self.current_map_cost = 0.0  # Auto-calculated from consumed items
-        self.total_map_cost = 0.0  # Cumulative map cost across all maps
-        self.consumed_items_current = {}  # Track consumed items per map
-
-        # Track previous bag counts to calculate deltas
-        self.previous_bag_counts = {}
+        self.view_client = "All"  # "All" = combined view, otherwise a client name
 
         # Drop window references
         self.drop_window = None
         self.drop_listbox = None
+        self.map_stats_window = None
+        self.map_stats_tree = None
+        self.drop_log_viewer = None
+        self.flash_left = 0  # high-value drop flash steps still to run
+
+        # Profit chart - history is recorded even while the chart is closed
+        self.profit_history = ProfitHistory()
+        self.chart = None
 
         # Settings
-        self.settings = {
-            "map_cost": 0.0,
-            "opacity": 1.0,
-            "apply_tax": False,
-            "log_path": ""
-        }
+        self.settings = default_settings()
         
         # Load data
-        self.load_item_database()
         self.load_settings()
-        
+        # Fixed log file (e.g. a test log) instead of game detection - this run only
+        self.log_override = log_path
+        setup_logging(self.settings)
+
+        # One engine tails every client log; state changes run on the Tk thread
+        self.engine = TrackerEngine.from_settings(
+            self.settings, load_item_database(bin_path=self.settings.get('item_catalog')),
+            dispatch=lambda fn: self.window.after(0, fn), log_path=self.log_override)
+        self.engine.listeners.append(self.on_engine_event)
+
         # Create UI
         self.create_ui()
-
-        # Reset all data on startup
-        self._reset_data_silent()
         self.update_display()
 
-        # Find game
-        if HAS_WIN_SUPPORT:
-            self.find_game_log()
-        else:
+        if not HAS_WIN_SUPPORT and not self.log_override and self.settings.get('log_discovery', 'auto') != "path":
             self.status.config(text="⚠ Windows support not available", foreground='orange')
-        
-        # Start threads
+
+        # Start threads - discovery keeps looking for logs in the background
         self.running = True
-        self.log_position = 0
         self.start_threads()
         
         self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-    def load_item_database(self):
-        self.item_db = {}
-        try:
-            with open("full_table_en.json", "r", encoding="utf-8") as f:
-                full_table = json.load(f)
-            for item_id, data in full_table.items():
-                self.item_db[item_id] = {
-                    "name": data.get("name", "Unknown"),
-                    "type": data.get("type", "Other"),
-                    "price": data.get("price", 0)
-                }
-            print(f"✓ Loaded {len(self.item_db)} items from database")
-        except Exception as e:
-            print(f"⚠ Error loading database: {e}")
-            self.item_db = {
-                "100300": {"name": "初火源质", "type": "硬通货", "price": 1.0},
-                "100200": {"name": "初火灵砂", "type": "硬通货", "price": 0.002},
-                "5028": {"name": "异界回响", "type": "硬通货", "price": 0.14},
-            }
-            
     def create_ui(self):
         self.window.attributes('-topmost', True)
         self.window.attributes('-alpha', self.settings['opacity'])
@@ -225,6 +3691,13 @@ class FurTorchV5:
         self.lbl_total_time.grid(row=1, column=1, padx=5)
         self.lbl_total_speed = ttk.Label(stats, text="0/min")
         self.lbl_total_speed.grid(row=1, column=2)
+
+        # Rolling profit/min and drops/min over the last 1/5/15/60 minutes
+        ttk.Label(stats, text="Rolling:").grid(row=2, column=0, sticky=tk.W)
+        self.lbl_rolling_profit = ttk.Label(stats, text="", font=('Arial', 9))
+        self.lbl_rolling_profit.grid(row=2, column=1, columnspan=2, sticky=tk.W, padx=5)
+        self.lbl_rolling_drops = ttk.Label(stats, text="", font=('Arial', 9), foreground='gray')
+        self.lbl_rolling_drops.grid(row=3, column=1, columnspan=2, sticky=tk.W, padx=5)
         
         income_frame = ttk.Frame(main)
         income_frame.grid(row=2, column=0, columnspan=3, pady=8)
@@ -254,6 +3727,15 @@ class FurTorchV5:
         
         self.btn_view = ttk.Button(btn, text="Total", command=self.toggle_view, width=10)
         self.btn_view.grid(row=0, column=2, padx=2)
+
+        # Client selector - only shown when more than one log is tracked
+        if len(self.engine.sessions) > 1:
+            names = ["All"] + [s.name for s in self.engine.sessions]
+            self.client_var = tk.StringVar(value=self.view_client)
+            client_box = ttk.Combobox(btn, textvariable=self.client_var, values=names,
+                                      state="readonly", width=10)
+            client_box.grid(row=0, column=3, padx=2)
+            client_box.bind("<<ComboboxSelected>>", lambda e: self.select_client(self.client_var.get()))
         
         extra = ttk.Frame(main)
         extra.grid(row=4, column=0, columnspan=3, pady=3)
@@ -262,308 +3744,141 @@ class FurTorchV5:
         ttk.Button(extra, text="Settings", command=self.show_settings, width=8).grid(row=0, column=1, padx=2)
         ttk.Button(extra, text="Export", command=self.export_data, width=8).grid(row=0, column=2, padx=2)
         ttk.Button(extra, text="Reset", command=self.reset_all, width=8).grid(row=0, column=3, padx=2)
+        ttk.Button(extra, text="Maps", command=self.show_map_stats, width=8).grid(row=0, column=4, padx=2)
+        ttk.Button(extra, text="Chart", command=self.show_chart, width=8).grid(row=0, column=5, padx=2)
         
         self.status = ttk.Label(main, text="Initializing...", foreground='gray', font=('Arial', 9))
         self.status.grid(row=5, column=0, columnspan=3, pady=5)
         
-    def find_game_log(self):
-        try:
-            hwnd = win32gui.FindWindow(None, "Torchlight: Infinite  ")
-            if not hwnd:
-                self.status.config(text="⚠ Game not detected. Start game first!", foreground='orange')
-                return
-            
-            tid, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
-            game_exe = process.exe()
-            
-            print(f"Game exe: {game_exe}")
-            
-            game_dir = os.path.dirname(game_exe)
-            
-            # Try correct path with UE_game
-            log_path1 = os.path.join(game_dir, "../../UE_game/TorchLight/Saved/Logs/UE_game.log")
-            log_path1 = os.path.normpath(log_path1)
-            
-            # Fallback path
-            log_path2 = os.path.join(game_dir, "../../TorchLight/Saved/Logs/UE_game.log")
-            log_path2 = os.path.normpath(log_path2)
-            
-            log_path = None
-            if os.path.exists(log_path1):
-                log_path = log_path1
-                print(f"✓ Found log (Method 1): {log_path}")
-            elif os.path.exists(log_path2):
-                log_path = log_path2
-                print(f"✓ Found log (Method 2): {log_path}")
-            else:
-                print(f"❌ Log not found")
-                self.status.config(text="⚠ Log file not found! Enable logging!", 
-                                  foreground='orange')
-                return
-            
-            self.settings['log_path'] = log_path
-
-            # Move to end of file to skip historical data - only track current session
-            print("Moving to end of log file (skipping historical data)...")
-            with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Seek to end of file immediately - don't read historical data
-                f.seek(0, 2)
-                self.log_position = f.tell()
-
-            print(f"✓ Ready to track current session only (historical data ignored)")
-            self.status.config(text="✓ Game detected! Monitoring pickup events!",
-                              foreground='#10b981')
-            print(f"✓ Monitoring: {log_path}")
-            print("✓ Looking for: ItemChange and BagMgr pickup events")
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            self.status.config(text=f"⚠ Error: {str(e)[:40]}", foreground='red')
-            
-    def start_threads(self):
-        def update_loop():
-            while self.running:
-                if self.is_tracking:
-                    self.window.after(0, self.update_display)
-                time.sleep(1)
-        threading.Thread(target=update_loop, daemon=True).start()
-        
-        if self.settings.get('log_path'):
-            def monitor_loop():
-                while self.running:
-                    try:
-                        self.read_new_log_lines()
-                    except Exception as e:
-                        print(f"Monitor error: {e}")
-                    time.sleep(0.5)
-            threading.Thread(target=monitor_loop, daemon=True).start()
-            print("✓ Log monitor thread started")
-            
-    def read_new_log_lines(self):
-        if not self.settings.get('log_path'):
-            return
-            
-        try:
-            with open(self.settings['log_path'], 'r', encoding='utf-8', errors='ignore') as f:
-                f.seek(self.log_position)
-                new_text = f.read()
-                self.log_position = f.tell()
-                
-                if new_text:
-                    self.parse_log_text(new_text)
-        except Exception as e:
-            print(f"[ERROR] Read error: {e}")
-            
-    def parse_log_text(self, text):
-        """
-        Parse game log text for map transitions and item pickups/consumption.
-        
-        CRITICAL: This function calculates item pickup quantities by tracking
-        the DELTA between old and new bag counts. The previous_bag_counts
-        dictionary must persist across maps to correctly calculate deltas.
-        
-        Logic:
-        - BagMgr line shows: ConfigBaseId = [ITEM_ID] Num = [NEW_TOTAL]
-        - We compare NEW_TOTAL with previous count (from previous_bag_counts)
-        - delta = new_count - old_count
-        - If delta > 0: Items picked up (add to drops)
-        - If delta < 0: Items consumed (add to map cost)
-        """
-        # Check map transitions
-        if "PageApplyBase@ _UpdateGameEnd" in text:
-            if "XZ_YuJinZhiXiBiNanSuo200" in text and "NextSceneName = World'/Game/Art/Maps" in text:
-                if not self.is_in_map:
-                    print("[MAP] Entering map")
-                    self.window.after(0, self.auto_start_map)
-            elif "NextSceneName = World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200" in text:
-                if self.is_in_map:
-                    print("[MAP] Exiting map")
-                    self.window.after(0, self.auto_end_map)
-        
-        # Parse BagMgr events to track item pickups and consumption
-        lines = text.split('\n')
-        for line in lines:
-            if 'BagMgr@' in line and 'ConfigBaseId' in line and 'Num = ' in line:
-                try:
-                    # Extract ConfigBaseId (item ID)
-                    base_id_match = re.search(r'ConfigBaseId\s*=\s*(\d+)', line)
-                    # Extract Num (total count in bag NOW)
-                    num_match = re.search(r'Num\s*=\s*(\d+)', line)
-
-                    if base_id_match and num_match:
-                        item_id = base_id_match.group(1)
-                        new_count = int(num_match.group(1))
-
-                        # Calculate delta from previous count
-                        old_count = self.previous_bag_counts.get(item_id, 0)
-                        delta = new_count - old_count
-
-                        if delta > 0:
-                            # Items picked up (positive delta)
-                            print(f"[DROP] ID:{item_id} x{delta} (bag: {old_count} -> {new_count})")
-                            self.window.after(0, lambda id=item_id, c=delta: self.add_drop(id, c))
-                        elif delta < 0:
-                            # Items consumed (negative delta)
-                            consumed = abs(delta)
-                            print(f"[CONSUMED] ID:{item_id} x{consumed} (bag: {old_count} -> {new_count})")
-                            self.window.after(0, lambda id=item_id, c=consumed: self.add_consumed(id, c))
-
-                        # Update tracking - MUST persist across maps!
-                        self.previous_bag_counts[item_id] = new_count
-                except Exception as e:
-                    print(f"[ERROR] Failed to parse BagMgr line: {e}")
-                
-    def add_consumed(self, item_id, count):
-        """Track consumed items and calculate map cost"""
-        if item_id not in self.item_db:
-            print(f"⚠ Unknown consumed item: {item_id}")
-            return
-
-        item = self.item_db[item_id]
-        price = item['price']
+    @property
+    def item_db(self):
+        return self.engine.item_db
 
-        if self.settings['apply_tax'] and item_id != "100300":
-            price = price * 0.875
-
-        value = price * count
+    def selected_session(self):
+        """The client being viewed, or None for the combined view"""
+        return self.engine.get_session(self.view_client)
 
-        # Track consumed items for current map
-        self.consumed_items_current[item_id] = self.consumed_items_current.get(item_id, 0) + count
-
-        # Add to map cost
-        self.current_map_cost += value
+    def control_session(self):
+        """The client the Start/End buttons act on"""
+        return self.selected_session() or self.engine.sessions[0]
 
-        print(f"✓ Consumed: {item['name']} x{count} = {value:.2f} (total map cost: {self.current_map_cost:.2f})")
+    def select_client(self, name):
+        self.view_client = name
         self.update_display()
+        self.update_map_stats()
 
-    def auto_start_map(self):
-        if not self.is_in_map:
-            self.is_in_map = True
-            self.is_tracking = True
-            self.current_time = 0
-            self.current_income = 0  # Don't subtract manual map_cost anymore
-            self.drops_current = {}
-            self.consumed_items_current = {}
-            # BUG FIX: DON'T reset previous_bag_counts here!
-            # We need to keep tracking bag counts across maps to calculate proper deltas.
-            # If we reset this, the first pickup in a new map will use the full bag count
-            # instead of just the delta from the previous count.
-            # self.previous_bag_counts = {}  # REMOVED - Keep tracking across maps
-            self.current_map_cost = 0.0  # Reset auto-calculated map cost
-            self.map_count += 1
-            self.start_time = time.time()
-            self.btn_start.config(state=tk.DISABLED)
-            self.btn_end.config(state=tk.NORMAL)
-            self.status.config(text=f"🗺 Tracking Map #{self.map_count}...", foreground='#10b981')
-            
-    def auto_end_map(self):
-        if self.is_in_map:
-            self.is_in_map = False
-            self.is_tracking = False
-            elapsed = int(time.time() - self.start_time)
-            self.total_time += elapsed
-
-            # Subtract map cost from total income (so total profit is net)
-            self.total_income -= self.current_map_cost
+    def on_engine_event(self, session, event):
+        """Engine listener - runs on the Tk thread via window.after"""
+        if event == "alert":
+            self.show_alert(self.engine.alerts.history[-1])
+        elif event == "status":
+            text, color = session.status
+            if len(self.engine.sessions) > 1:
+                text = f"[{session.name}] {text}"
+            self.status.config(text=text, foreground=color)
+        else:
+            self.update_display()
+            if event == "map_end":
+                self.update_map_stats()
+            self.record_chart_event(session, event)
 
-            # Accumulate total map cost across all maps
-            self.total_map_cost += self.current_map_cost
+    def show_alert(self, alert):
+        """High-value drop: status line, sound and a flash - all without blocking the Tk thread"""
+        where = f" - map {alert.map_number}" if alert.map_number else ""
+        if len(self.engine.sessions) > 1:
+            where = f" [{alert.client}]{where}"
+        self.status.config(text=f"★ {alert.name} x{alert.count} = {alert.value:.0f}{where}",
+                           foreground='#f59e0b')
+        if self.settings.get('alert_sound', True):
+            if winsound:
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)  # returns immediately
+            else:
+                self.window.bell()
+        running = self.flash_left > 0
+        self.flash_left = 8
+        if not running:
+            self.flash_step()
 
-            # Calculate net profit for this map (before resetting)
-            net_profit = self.current_income - self.current_map_cost
-            map_cost_display = self.current_map_cost
+    def flash_step(self):
+        """One blink of the alert flash; reschedules itself with after()"""
+        self.flash_left -= 1
+        if self.flash_left % 2:
+            self.window.attributes('-alpha', 1.0)
+            self.lbl_income.config(foreground='#f59e0b')
+        else:
+            self.window.attributes('-alpha', self.settings['opacity'])
+            self.update_display()  # restores the profit colour
+        if self.flash_left > 0:
+            self.window.after(250, self.flash_step)
 
-            self.btn_start.config(state=tk.NORMAL)
-            self.btn_end.config(state=tk.DISABLED)
-            self.status.config(text=f"✓ Map done! Profit: {net_profit:.2f} (cost: {map_cost_display:.2f})",
-                              foreground='#8b5cf6')
+    def start_threads(self):
+        def update_loop():
+            while self.running:
+                if self.engine.is_tracking():
+                    self.window.after(0, self.update_display)
+                self.window.after(0, self.sample_chart)
+                time.sleep(1)
+        threading.Thread(target=update_loop, daemon=True).start()
 
-            # Reset current values after accumulating to totals
-            # This ensures "Current" view shows 0 when not in a map
-            self.current_time = 0
-            self.current_income = 0
-            self.current_map_cost = 0.0
-            self.drops_current = {}
-            self.consumed_items_current = {}
+        self.engine.start()
 
-            self.update_display()
-            
     def manual_start(self):
-        self.auto_start_map()
+        self.control_session().auto_start_map()
         
     def manual_end(self):
-        self.auto_end_map()
-        
-    def add_drop(self, item_id, count):
-        if item_id not in self.item_db:
-            print(f"⚠ Unknown item: {item_id}")
-            return
-        
-        item = self.item_db[item_id]
-        price = item['price']
-        
-        if self.settings['apply_tax'] and item_id != "100300":
-            price = price * 0.875
-        
-        value = price * count
-        
-        self.drops_current[item_id] = self.drops_current.get(item_id, 0) + count
-        self.drops_total[item_id] = self.drops_total.get(item_id, 0) + count
-        
-        self.current_income += value
-        self.total_income += value
-        
-        # Write to drop_log.txt
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        try:
-            with open("drop_log.txt", "a", encoding="utf-8") as f:
-                f.write(f"[{timestamp}] {item['name']} x{count} ({price:.3f})\n")
-            print(f"✓ Logged to drop_log.txt")
-        except Exception as e:
-            print(f"⚠ Could not write to drop_log.txt: {e}")
-        
-        print(f"✓ Added: {item['name']} x{count} = {value:.2f}")
-        self.update_display()
+        self.control_session().auto_end_map()
         
     def update_display(self):
-        if self.is_tracking:
-            self.current_time = int(time.time() - self.start_time)
+        snap = self.engine.snapshot(self.selected_session())
+        current_time = snap['current_time']
+        total_time = snap['total_time']
 
-        m, s = divmod(self.current_time, 60)
+        m, s = divmod(current_time, 60)
         self.lbl_time.config(text=f"{m}m{s:02d}s")
 
-        tm, ts = divmod(self.total_time + (self.current_time if self.is_tracking else 0), 60)
+        tm, ts = divmod(total_time, 60)
         self.lbl_total_time.config(text=f"{tm}m{ts:02d}s")
 
         # Calculate net profit (income - map cost)
-        current_net_profit = self.current_income - self.current_map_cost
-        total_net_profit = self.total_income  # Total already accounts for all maps
+        current_net_profit = snap['current_income'] - snap['current_map_cost']
+        total_net_profit = snap['total_income']  # Total already accounts for all maps
 
-        if self.current_time > 0:
-            speed = (current_net_profit / self.current_time) * 60
+        if current_time > 0:
+            speed = (current_net_profit / current_time) * 60
             self.lbl_speed.config(text=f"{speed:.2f}/min")
 
-        total_time_calc = self.total_time + (self.current_time if self.is_tracking else 0)
-        if total_time_calc > 0:
-            total_speed = (total_net_profit / total_time_calc) * 60
+        if total_time > 0:
+            total_speed = (total_net_profit / total_time) * 60
             self.lbl_total_speed.config(text=f"{total_speed:.2f}/min")
 
+        rolling = snap['rolling']
+        self.lbl_rolling_profit.config(
+            text="  ".join(f"{m}m " + (f"{rolling[m][0]:.1f}" if rolling[m] else "-")
+                           for m in ROLLING_WINDOWS) + " /min")
+        self.lbl_rolling_drops.config(
+            text="  ".join(f"{m}m " + (f"{rolling[m][1]:.1f}" if rolling[m] else "-")
+                           for m in ROLLING_WINDOWS) + " drops/min")
+
         # Display map cost
         if self.view_mode == "current":
-            self.lbl_map_cost.config(text=f"💰 Map Cost: {self.current_map_cost:.2f}")
+            self.lbl_map_cost.config(text=f"💰 Map Cost: {snap['current_map_cost']:.2f}")
         else:
-            self.lbl_map_cost.config(text=f"💰 Total Cost: {self.total_map_cost:.2f}")
+            self.lbl_map_cost.config(text=f"💰 Total Cost: {snap['total_map_cost']:.2f}")
 
         # Display net profit
         profit = current_net_profit if self.view_mode == "current" else total_net_profit
         color = '#10b981' if profit >= 0 else '#ef4444'
         profit_label = "Map Profit" if self.view_mode == "current" else "Total Profit"
         self.lbl_income.config(text=f"🔥 {profit_label}: {profit:.2f}", foreground=color)
-        self.lbl_maps.config(text=f"🎫 {self.map_count}")
+        self.lbl_maps.config(text=f"🎫 {snap['map_count']}")
+
+        # Start/End follow the client the buttons control
+        in_map = self.control_session().is_in_map
+        self.btn_start.config(state=tk.DISABLED if in_map else tk.NORMAL)
+        self.btn_end.config(state=tk.NORMAL if in_map else tk.DISABLED)
 
         # Update drop list if window is open
-        self.update_drop_list()
+        self.update_drop_list(snap)
         
     def toggle_view(self):
         self.view_mode = "total" if self.view_mode == "current" else "current"
@@ -593,6 +3908,20 @@ class FurTorchV5:
             win.destroy()
         win.protocol("WM_DELETE_WINDOW", on_close)
 
+        # Search box - filters as you type (name EN/CN, type or ID)
+        search = ttk.Frame(win)
+        search.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Label(search, text="🔍").pack(side=tk.LEFT)
+        self.drop_search_var = tk.StringVar()
+        self.drop_search_var.trace_add("write", lambda *args: self.update_drop_list())
+        entry = ttk.Entry(search, textvariable=self.drop_search_var)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        entry.focus_set()
+        self.drop_catalog_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search, text="Catalog", variable=self.drop_catalog_var,
+                        command=self.update_drop_list).pack(side=tk.LEFT)
+        ttk.Button(search, text="Log", command=self.show_drop_log, width=5).pack(side=tk.LEFT, padx=(5, 0))
+
         frame = ttk.Frame(win)
         frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
@@ -609,7 +3938,7 @@ class FurTorchV5:
         # Initial update
         self.update_drop_list()
 
-    def update_drop_list(self):
+    def update_drop_list(self, snap=None):
         """Update the drop list if the window is open"""
         if not self.drop_listbox or not self.drop_window or not self.drop_window.winfo_exists():
             return
@@ -617,25 +3946,129 @@ class FurTorchV5:
         # Clear current list
         self.drop_listbox.delete(0, tk.END)
 
-        drops = self.drops_current if self.view_mode == "current" else self.drops_total
+        query = self.drop_search_var.get()
+
+        # Catalog mode: look up any item, not just what dropped
+        if self.drop_catalog_var.get():
+            for item_id in self.engine.search_index.search(query, limit=200):
+                item = self.item_db[item_id]
+                self.drop_listbox.insert(
+                    tk.END, f"{item['name']} ({item_id}, {item['type']}) [{self.engine.item_price(item_id):.3f}]")
+            return
+
+        if snap is None:
+            snap = self.engine.snapshot(self.selected_session())
+        drops = snap['drops_current'] if self.view_mode == "current" else snap['drops_total']
+        if query.strip():
+            matches = set(self.engine.search_index.search(query))
+            drops = {k: v for k, v in drops.items() if k in matches}
 
         if not drops:
-            self.drop_listbox.insert(tk.END, "No drops yet!")
+            self.drop_listbox.insert(tk.END, "No matching drops!" if query.strip() else "No drops yet!")
         else:
             for item_id, count in sorted(drops.items(),
                                         key=lambda x: self.item_db[x[0]]['price'] * x[1],
                                         reverse=True):
                 item = self.item_db[item_id]
-                price = item['price']
-                if self.settings['apply_tax'] and item_id != "100300":
-                    price *= 0.875
-                value = price * count
+                value = self.engine.item_price(item_id) * count
                 self.drop_listbox.insert(tk.END, f"{item['name']} x{count} [{value:.2f}]")
             
+    def show_drop_log(self):
+        """Browse the whole drop_log.txt, however large"""
+        if self.drop_log_viewer and self.drop_log_viewer.exists():
+            self.drop_log_viewer.window.lift()
+            return
+        self.drop_log_viewer = DropLogViewer(self.window)
+
+    def show_map_stats(self):
+        # If window already exists, just bring it to front
+        if self.map_stats_window and self.map_stats_window.winfo_exists():
+            self.map_stats_window.lift()
+            return
+
+        win = tk.Toplevel(self.window)
+        win.title("Map Statistics")
+        win.geometry("560x180")
+        win.attributes('-topmost', True)
+        self.map_stats_window = win
+
+        def on_close():
+            self.map_stats_window = None
+            self.map_stats_tree = None
+            win.destroy()
+        win.protocol("WM_DELETE_WINDOW", on_close)
+
+        columns = ("mean", "std", "p10", "p50", "p90", "p99")
+        tree = ttk.Treeview(win, columns=columns, height=len(MAP_METRICS))
+        tree.heading("#0", text="Metric")
+        tree.column("#0", width=110)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=70, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+        self.map_stats_tree = tree
+
+        self.lbl_map_stats = ttk.Label(win, text="", foreground='gray')
+        self.lbl_map_stats.pack(pady=5)
+
+        self.update_map_stats()
+
+    def update_map_stats(self):
+        """Refresh the map statistics window if it is open"""
+        if not self.map_stats_tree or not self.map_stats_window.winfo_exists():
+            return
+
+        summary = self.engine.map_summary(self.selected_session())
+        tree = self.map_stats_tree
+        tree.delete(*tree.get_children())
+        labels = {"profit": "Profit", "duration": "Duration (s)", "cost": "Cost", "profit_per_min": "Profit/min"}
+        for metric in MAP_METRICS:
+            stats = summary[metric]
+            tree.insert("", tk.END, text=labels[metric],
+                        values=[f"{stats[col]:.2f}" for col in ("mean", "std", "p10", "p50", "p90", "p99")])
+        zones = sorted(summary["zones"].items(), key=lambda z: -z[1]["count"])
+        by_zone = "   ".join(f"{zone or '?'}: {z['count']} ({z['mean_profit']:.1f} avg)" for zone, z in zones[:4])
+        self.lbl_map_stats.config(text=f"{summary['profit']['count']} maps   {by_zone}".rstrip())
+
+    def show_chart(self):
+        if self.chart and self.chart.exists():
+            self.chart.window.lift()
+            return
+        self.chart = ProfitChart(self.window, self.profit_history)
+
+    def _chart_profit(self):
+        """Live net profit of all clients (finished maps + the current ones)"""
+        snap = self.engine.snapshot()
+        rolling = snap['rolling'][5]
+        return (snap['total_income'] + snap['current_income'] - snap['current_map_cost'],
+                rolling[0] if rolling else 0.0)
+
+    def sample_chart(self):
+        profit, rolling = self._chart_profit()
+        if self.profit_history.sample(time.time(), profit, rolling) and self.chart and self.chart.exists():
+            self.chart.append()
+
+    def record_chart_event(self, session, event):
+        """Map boundaries and big drops become chart markers"""
+        now = time.time()
+        chart_open = self.chart and self.chart.exists()
+        if event == "map_start":
+            self.profit_history.map_starts.append(now)
+            if chart_open:
+                self.chart.add_map_start(now)
+        elif event == "drop" and session.last_drop:
+            item_id, count, value = session.last_drop
+            if value >= self.settings.get('chart_big_drop', 100.0):
+                profit = self._chart_profit()[0]
+                label = f"{self.item_db[item_id]['name'][:16]} {value:.0f}"
+                self.profit_history.big_drops.append((now, profit, label))
+                if chart_open:
+                    self.chart.add_big_drop(now, profit, label)
+
     def show_settings(self):
         win = tk.Toplevel(self.window)
         win.title("Settings")
-        win.geometry("350x200")
+        win.geometry("350x340")
         win.attributes('-topmost', True)
         
         frame = ttk.Frame(win, padding="20")
@@ -652,73 +4085,79 @@ class FurTorchV5:
         
         tax_var = tk.BooleanVar(value=self.settings['apply_tax'])
         ttk.Checkbutton(frame, text="Apply Tax (12.5%)", variable=tax_var).grid(row=2, columnspan=2, pady=5)
+
+        # Console diagnostics - applied immediately, no restart needed
+        ttk.Label(frame, text="Log Level:").grid(row=3, column=0, pady=5, sticky=tk.W)
+        log_level_var = tk.StringVar(value=self.settings['log_level'])
+        ttk.Combobox(frame, textvariable=log_level_var, values=LOG_LEVELS,
+                     state="readonly", width=12).grid(row=3, column=1, pady=5)
+
+        ttk.Label(frame, text="Event Log:").grid(row=4, column=0, pady=5, sticky=tk.W)
+        event_level_var = tk.StringVar(value=self.settings['event_log_level'])
+        ttk.Combobox(frame, textvariable=event_level_var, values=LOG_LEVELS,
+                     state="readonly", width=12).grid(row=4, column=1, pady=5)
+
+        # Default high-value drop alert; per-item/type rules live in config.json
+        ttk.Label(frame, text="Alert Value:").grid(row=5, column=0, pady=5, sticky=tk.W)
+        alert_default = self.settings['drop_alerts'].get('default')
+        alert_var = tk.StringVar(value="" if alert_default is None else str(alert_default))
+        ttk.Entry(frame, textvariable=alert_var, width=15).grid(row=5, column=1, pady=5)
+
+        sound_var = tk.BooleanVar(value=self.settings.get('alert_sound', True))
+        ttk.Checkbutton(frame, text="Alert Sound", variable=sound_var).grid(row=6, columnspan=2, pady=5)
         
         def save():
             try:
                 self.settings['map_cost'] = float(cost_var.get())
                 self.settings['opacity'] = opacity_var.get()
                 self.settings['apply_tax'] = tax_var.get()
+                self.settings['log_level'] = log_level_var.get()
+                self.settings['event_log_level'] = event_level_var.get()
+                alert_value = alert_var.get().strip()
+                self.settings['drop_alerts'] = dict(self.settings['drop_alerts'],
+                                                    default=float(alert_value) if alert_value else None)
+                self.settings['alert_sound'] = sound_var.get()
+                set_log_levels(self.settings)
+                self.engine.reload_alerts()
                 self.save_settings()
                 messagebox.showinfo("Settings", "Saved!")
                 win.destroy()
             except:
-                messagebox.showerror("Error", "Invalid map cost!")
+                messagebox.showerror("Error", "Invalid map cost or alert value!")
         
-        ttk.Button(frame, text="Save", command=save).grid(row=3, columnspan=2, pady=10)
+        ttk.Button(frame, text="Save", command=save).grid(row=7, columnspan=2, pady=10)
         
     def export_data(self):
         filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        data = {
-            "total_time": self.total_time,
-            "total_income": self.total_income,
-            "total_map_cost": self.total_map_cost,
-            "map_count": self.map_count,
-            "drops": {self.item_db[k]['name']: v for k, v in self.drops_total.items()}
-        }
+        def summary(snap):
+            return {
+                "total_time": snap['total_time'],
+                "total_income": snap['total_income'],
+                "total_map_cost": snap['total_map_cost'],
+                "map_count": snap['map_count'],
+                "drops": {self.item_db[k]['name']: v for k, v in snap['drops_total'].items()}
+            }
+
+        data = summary(self.engine.snapshot())
+        data["map_stats"] = self.engine.map_summary()
+        data["alerts"] = [alert._asdict() for alert in self.engine.alerts.history]
+        if len(self.engine.sessions) > 1:
+            data["clients"] = {s.name: dict(summary(self.engine.snapshot(s)),
+                                            map_stats=self.engine.map_summary(s))
+                               for s in self.engine.sessions}
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
         messagebox.showinfo("Export", f"Saved to {filename}")
         
-    def _reset_data_silent(self):
-        """
-        Reset all statistics without confirmation - used on startup and manual reset.
-        
-        IMPORTANT: We do NOT reset previous_bag_counts here!
-        - previous_bag_counts tracks the last known inventory state
-        - It's needed to calculate deltas (new - old = picked up amount)
-        - Resetting it would cause the next pickup to show the full bag count
-        
-        For a clean session reset, we want:
-        - Statistics to reset to 0 (time, income, drops, etc.)
-        - But inventory tracking to continue (so deltas are accurate)
-        """
-        self.current_time = self.total_time = 0
-        self.current_income = self.total_income = 0
-        self.current_map_cost = self.total_map_cost = 0.0
-        self.map_count = 0
-        self.drops_current = self.drops_total = {}
-        self.consumed_items_current = {}
-        # DON'T reset previous_bag_counts - we need it for delta calculation!
-        # self.previous_bag_counts = {}  # REMOVED - Keep for accurate tracking
-        self.is_tracking = self.is_in_map = False
-        if hasattr(self, 'btn_start'):
-            self.btn_start.config(state=tk.NORMAL)
-            self.btn_end.config(state=tk.DISABLED)
-        print("✓ Data reset - statistics cleared, inventory tracking maintained")
-
     def reset_all(self):
         if messagebox.askyesno("Reset", "Reset all statistics?"):
-            self._reset_data_silent()
+            self.engine.reset_all()
             self.update_display()
+            self.update_map_stats()
             self.status.config(text="✓ Statistics reset", foreground='gray')
             
     def load_settings(self):
-        try:
-            if os.path.exists("config.json"):
-                with open("config.json", 'r', encoding='utf-8') as f:
-                    self.settings.update(json.load(f))
-        except:
-            pass
+        load_settings_file(self.settings)
             
     def save_settings(self):
         try:
@@ -729,7 +4168,9 @@ class FurTorchV5:
             
     def on_closing(self):
         self.running = False
+        self.engine.stop()
         self.save_settings()
+        stop_logging()
         self.window.destroy()
         
     def run(self):
@@ -745,9 +4186,36 @@ if __name__ == "__main__":
     print("Compatible with: 2025.10.23+ game log format")
     print()
     
+    import argparse
+    parser = argparse.ArgumentParser(description="FE Infinite drop tracker")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window; serve stats over HTTP/WebSocket")
+    parser.add_argument("--log", help="track this log file (disables game detection)")
+    parser.add_argument("--host", help="stats server address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="stats server port (default 8765)")
+    parser.add_argument("--rate", type=float, help="max WebSocket updates per second")
+    parser.add_argument("--replay", metavar="LOG", help="re-run a saved log and print a JSON report")
+    args = parser.parse_args()
+
     try:
-        app = FurTorchV5()
-        app.run()
+        if args.replay:
+            settings = default_settings()
+            load_settings_file(settings)
+            setup_logging(settings)
+            engine = replay_log(args.replay, settings)
+            report = engine.snapshot()
+            report["map_stats"] = engine.map_summary()
+            stop_logging()
+            print(json.dumps(report, indent=4, ensure_ascii=False))
+        elif args.headless:
+            settings = default_settings()
+            load_settings_file(settings)
+            setup_logging(settings)
+            run_headless(settings, args.host, args.port, args.rate, args.log)
+            stop_logging()
+        else:
+            app = FurTorchV5(args.log)
+            app.run()
     except Exception as e:
         print(f"Error: {e}")
         import traceback
@@ -20,6 +20,10 @@ if not os.path.exists("full_table_en.json"):
 
 print("✓ Files found")
 
+# Compile the binary item catalog
+subprocess.run([sys.executable, "build_catalog.py"], check=True, stdout=subprocess.DEVNULL)
+print("✓ item_catalog.bin compiled")
+
 # Clean old build
 print("\nCleaning old build...")
 for item in ["build", "dist", "furtorch_v5.spec"]:
@@ -37,6 +41,8 @@ build_cmd = [
     "--windowed",
     "--name=FurTorch_v5",
     "--add-data=full_table_en.json;.",
+    "--add-data=full_table.json;.",
+    "--add-data=item_catalog.bin;.",
     "--hidden-import=win32gui",
     "--hidden-import=win32process",
     "--hidden-import=win32api",
@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+# Soak test: append realistic game log lines while the tracker runs headless
+# Usage: python soak_test.py [--duration 3600] [--rate 20] [--burst-size 200 --burst-every 60] [--sort-every 45]
+#
+# A writer thread appends BagMgr pickups/consumption and map transitions to a
+# fresh log at the given rate (plus periodic bursts, bag sorts and noise
+# lines). Items stack up to STACK_MAX per slot, so big pickups spill into
+# new slots and consumption empties them. The tracker tails it exactly as in
+# --headless mode (StatsServer loop + engine I/O thread), and an event bus
+# subscriber checks the events against what was written: nothing lost,
+# nothing counted twice, no phantom pickups from sorting. Reports events/sec,
+# CPU, RSS growth and write-to-event latency percentiles. Linux only (/proc).
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import deque
+from datetime import datetime
+
+import furtorch_v5 as ft
+
+HIDEOUT = "/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200"
+MAPS = [f"/Game/Art/Maps/02KD/KD_Soak{i:02d}/KD_Soak{i:02d}.KD_Soak{i:02d}" for i in range(1, 6)]
+NOISE = [
+    "LogNet: Warning: UNetConnection::Tick: Connection TIMEOUT skipped",
+    "GameLog: Display: [Game] UIMgr@ Show Panel = PickupTips",
+    "LogStreaming: Display: Flushing async loaders.",
+]
+STACK_MAX = 50
+PAGES = (102, 103)
+SLOTS_PER_PAGE = 200
+
+
+def stamp(now):
+    t = datetime.fromtimestamp(now)
+    return t.strftime("[%Y.%m.%d-%H.%M.%S:") + f"{t.microsecond // 1000:03d}][  0]"
+
+
+def bag_line(now, page, slot, item_id, num):
+    return (f"{stamp(now)}GameLog: Display: [Game] BagMgr@:Modfy BagItem PageId = {page} "
+            f"SlotId = {slot} ConfigBaseId = {item_id} Num = {num}\n")
+
+
+def remove_line(now, page, slot):
+    return f"{stamp(now)}GameLog: Display: [Game] BagMgr@:RemoveBagItem PageId = {page} SlotId = {slot}\n"
+
+
+def map_line(now, last_scene, next_scene):
+    return (f"{stamp(now)}GameLog: Display: [Game] PageApplyBase@ _UpdateGameEnd: "
+            f"LastSceneName = World'{last_scene}' NextSceneName = World'{next_scene}'\n")
+
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+class LatencyHistogram:
+    """1 ms buckets up to 60 s: constant memory however long the run, so it doesn't skew RSS"""
+
+    def __init__(self, max_ms=60000):
+        self.buckets = array('L', [0]) * (max_ms + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[min(int(seconds * 1000), len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper edge (ms) of the bucket holding the q-quantile"""
+        rank = q * self.count
+        seen = 0
+        for ms, n in enumerate(self.buckets):
+            seen += n
+            if n and seen > rank:
+                return ms + 1
+        return 0
+
+
+# ==================== RECORDED SEQUENCES ====================
+
+# Bag excerpts in the shape the game writes them (timestamps trimmed), with
+# the net change the tracker must report for each. Run against a fresh
+# engine before the soak starts.
+T = "[2025.10.23-20.00.00:000][  0]GameLog: Display: [Game] "
+SORT_SEQUENCES = [
+    ("stack overflows into a new slot",
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 998"],
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 999",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 100300 Num = 4"],
+     {"100300": 5}),
+    ("sort reorders stacks",
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 999",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 5028 Num = 7",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 2 ConfigBaseId = 100300 Num = 40"],
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 5028 Num = 7",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 100300 Num = 999",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 2 ConfigBaseId = 100300 Num = 40"],
+     {}),
+    ("sort merges partial stacks",
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 30",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 100300 Num = 25"],
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 55",
+      T + "BagMgr@:RemoveBagItem PageId = 102 SlotId = 1"],
+     {}),
+    ("pickup into a partial stack",
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 999",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 100300 Num = 12"],
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 100300 Num = 22"],
+     {"100300": 10}),
+    ("consumption across stacks",
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 5028 Num = 20",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 1 ConfigBaseId = 5028 Num = 3"],
+     [T + "BagMgr@:RemoveBagItem PageId = 102 SlotId = 1",
+      T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 5028 Num = 15"],
+     {"5028": -8}),
+    ("stack moved to another page",
+     [T + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 4 ConfigBaseId = 5028 Num = 9"],
+     [T + "BagMgr@:RemoveBagItem PageId = 102 SlotId = 4",
+      T + "BagMgr@:Modfy BagItem PageId = 103 SlotId = 0 ConfigBaseId = 5028 Num = 9"],
+     {}),
+]
+
+
+def check_sequences(settings, item_db):
+    """Failure messages for the SORT_SEQUENCES the tracker gets wrong"""
+    failures = []
+    for name, baseline, lines, expected in SORT_SEQUENCES:
+        engine = ft.TrackerEngine(dict(settings, log_index_dir="", price_feed=""), item_db)
+        session = engine.add_session("Check")
+        session.write_drop_log = False
+        session.parse_log_text("\n".join(baseline) + "\n")
+        before = engine.journal.item_totals()
+        session.parse_log_text("\n".join(lines) + "\n")
+        net = {}
+        for item_id, (picked, consumed) in engine.journal.item_totals().items():
+            was = before.get(item_id, [0, 0])
+            delta = (picked - was[0]) - (consumed - was[1])
+            if delta:
+                net[item_id] = delta
+        if net != expected:
+            failures.append(f"{name}: expected {expected}, got {net}")
+    return failures + check_split_frame(settings, item_db)
+
+
+def check_split_frame(settings, item_db):
+    """
+    Failure messages if a sort the game writes across an empty poll is not
+    netted, or a lone trailing frame is never closed. Drives poll() by hand.
+    """
+    name, baseline, lines, expected = SORT_SEQUENCES[1]  # sort reorders stacks
+    path = os.path.abspath("split_frame.log")
+    open(path, "w").close()
+    engine = ft.TrackerEngine(dict(settings, log_index_dir="", price_feed=""), item_db)
+    session = engine.add_session("Split", path, "path")
+    session.write_drop_log = False
+    session.poll(skip_history=True)
+    session.parse_log_text("\n".join(baseline) + "\n")
+
+    def append(text):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    before = engine.journal.item_totals()
+    append(lines[0] + "\n")
+    session.poll()
+    session.poll()  # nothing new yet - the frame must stay open
+    append("\n".join(lines[1:]) + "\n")
+    session.poll()
+    append(f"{stamp(time.time())}{NOISE[0]}\n")  # a newer frame closes it
+    session.poll()
+    # A split sort shows up as a phantom pickup plus a phantom consume, so
+    # compare both counts rather than the net
+    failures = []
+    after = engine.journal.item_totals()
+    if after != before:
+        failures.append(f"{name}, split across an empty poll: expected no change, got {before} -> {after}")
+
+    # Nothing after it: the last frame closes once the grace period is over
+    append(f"{stamp(time.time())}GameLog: Display: [Game] BagMgr@:Modfy BagItem PageId = 102 "
+           f"SlotId = 9 ConfigBaseId = 100300 Num = 5\n")
+    session.poll()
+    time.sleep(ft.TrackerEngine.FRAME_GRACE)
+    session.poll()
+    picked = engine.journal.item_totals().get("100300", [0, 0])[0] - after.get("100300", [0, 0])[0]
+    if picked != 5:
+        failures.append(f"trailing frame after the grace period: expected 100300 +5, got {picked:+d}")
+    os.remove(path)
+    return failures
+
+
+# ==================== WRITER ====================
+
+class LogWriter:
+    """
+    Appends lines to the log and keeps the ground truth: for every pickup or
+    consumption (one or more BagMgr lines), the item's running total after
+    it and when it hit the file. Sorts move stacks around without changing
+    any total, so they add no truth.
+    """
+
+    TICK = 0.05
+
+    def __init__(self, path, item_ids, args):
+        self.path = path
+        self.item_ids = item_ids
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.bag = dict.fromkeys(item_ids, 0)  # item_id -> total over all slots
+        self.stacks = {item_id: [] for item_id in item_ids}  # item_id -> [[page, slot, num], ...]
+        self.free = [(page, slot) for page in PAGES for slot in range(SLOTS_PER_PAGE)][::-1]
+        self.expected = {}  # item_id -> deque of ([write time], running total)
+        self.written_total = {}  # item_id -> running total the tracker must end up at
+        self.picked = {}  # item_id -> total picked up
+        self.lock = threading.Lock()
+        self.events_written = self.maps_written = self.sorts_written = self.bytes_written = 0
+        self.in_map = False
+        self.scene = HIDEOUT
+        self.cpu = 0.0
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        if self.in_map:
+            self._write([self._map_change(time.time(), HIDEOUT)])
+
+    def _bag_change(self, now):
+        lines = []
+        if len(self.free) < 3:
+            # Bag (nearly) full: sell the biggest item outright, like a player would
+            item_id = max(self.item_ids, key=self.bag.get)
+            delta = -self.bag[item_id]
+        else:
+            item_id = self.rng.choice(self.item_ids)
+            delta = 0
+        stacks = self.stacks[item_id]
+        # Mostly pickups; consumption only of what the bag holds
+        if not delta and self.bag[item_id] and self.rng.random() < self.args.consume_ratio:
+            delta = -self.rng.randint(1, min(self.bag[item_id], STACK_MAX // 2))
+        if delta:
+            left = -delta
+            while left:  # from the last stacks, emptying slots as it goes
+                stack = stacks[-1]
+                take = min(left, stack[2])
+                stack[2] -= take
+                left -= take
+                if stack[2]:
+                    lines.append(bag_line(now, stack[0], stack[1], item_id, stack[2]))
+                else:
+                    lines.append(remove_line(now, stack[0], stack[1]))
+                    self.free.append((stack[0], stack[1]))
+                    stacks.pop()
+        else:
+            delta = self.rng.randint(1, 2 * STACK_MAX)
+            left = delta
+            while left:  # top up the last stack, then open new slots
+                if not stacks or stacks[-1][2] == STACK_MAX:
+                    stacks.append([*self.free.pop(), 0])
+                stack = stacks[-1]
+                put = min(left, STACK_MAX - stack[2])
+                stack[2] += put
+                left -= put
+                lines.append(bag_line(now, stack[0], stack[1], item_id, stack[2]))
+        self.bag[item_id] += delta
+        return "".join(lines), (item_id, delta)
+
+    def _sort(self, now):
+        """Bag sort: merge every item's stacks and lay them out again from slot 0"""
+        lines = []
+        layout = [(page, slot) for page in PAGES for slot in range(SLOTS_PER_PAGE)]
+        used = []
+        old = {(page, slot) for stacks in self.stacks.values() for page, slot, _ in stacks}
+        for item_id in self.rng.sample(self.item_ids, len(self.item_ids)):
+            total, stacks = self.bag[item_id], []
+            while total:
+                num = min(total, STACK_MAX)
+                page, slot = layout[len(used)]
+                used.append((page, slot))
+                stacks.append([page, slot, num])
+                lines.append(bag_line(now, page, slot, item_id, num))
+                total -= num
+            self.stacks[item_id] = stacks
+        for page, slot in sorted(old - set(used)):
+            lines.append(remove_line(now, page, slot))
+        self.free = layout[len(used):][::-1]
+        self.sorts_written += 1
+        return "".join(lines), None
+
+    def _map_change(self, now, next_scene):
+        line = map_line(now, self.scene, next_scene)
+        self.scene = next_scene
+        self.in_map = next_scene != HIDEOUT
+        self.maps_written += not self.in_map
+        return line, None
+
+    def _write(self, entries, frame_split=False):
+        noise = self.args.noise
+        chunks = []
+        for line, _ in entries:
+            chunks.append(line)
+            for _ in range(noise):
+                chunks.append(f"{stamp(time.time())}{self.rng.choice(NOISE)}\n")
+        data = "".join(chunks).encode("utf-8")
+
+        # Record the truth before the bytes land - the tracker may beat us to it
+        written = [time.time()]
+        with self.lock:
+            for _, truth in entries:
+                if truth:
+                    item_id, delta = truth
+                    total = self.written_total[item_id] = self.written_total.get(item_id, 0) + delta
+                    self.expected.setdefault(item_id, deque()).append((written, total))
+                    if delta > 0:
+                        self.picked[item_id] = self.picked.get(item_id, 0) + delta
+                    self.events_written += 1
+
+        with open(self.path, "ab") as f:
+            if frame_split and data.count(b"\n") > 1:
+                # Land the two halves of one frame in different tracker reads, often
+                # with an empty poll in between; the gap stays under FRAME_GRACE
+                cut = data.index(b"\n", len(data) // 2) + 1
+                f.write(data[:cut])
+                f.flush()
+                time.sleep(self.rng.uniform(0.2, 0.7) * ft.TrackerEngine.FRAME_GRACE)
+                f.write(data[cut:])
+            # Sometimes leave a line half-written for a moment, like the game does
+            elif self.args.split and len(data) > 40 and self.rng.random() < self.args.split:
+                cut = self.rng.randrange(1, len(data) - 1)
+                f.write(data[:cut])
+                f.flush()
+                time.sleep(self.rng.uniform(0, 0.6))
+                f.write(data[cut:])
+            else:
+                f.write(data)
+        written[0] = time.time()  # latency counts from when the whole write is in
+        self.bytes_written += len(data)
+
+    def _run(self):
+        args = self.args
+        due, last = 0.0, time.time()
+        next_burst = time.time() + args.burst_every if args.burst_size else float("inf")
+        next_map = time.time() + args.map_every if args.map_every else float("inf")
+        next_sort = time.time() + args.sort_every if args.sort_every else float("inf")
+        while self.running:
+            now = time.time()
+            entries = []
+            due += args.rate * (now - last)  # by elapsed time, so slow writes don't lower the rate
+            last = now
+            while due >= 1:
+                entries.append(self._bag_change(now))
+                due -= 1
+            if now >= next_burst:
+                entries += [self._bag_change(now) for _ in range(args.burst_size)]
+                next_burst += args.burst_every
+            if now >= next_map:
+                entries.append(self._map_change(now, HIDEOUT if self.in_map else self.rng.choice(MAPS)))
+                next_map += args.map_length if self.in_map else args.map_every
+            if entries:
+                self._write(entries)
+            if now >= next_sort:
+                # Split on purpose: the tracker must net the sort across reads
+                self._write([self._sort(now)], frame_split=True)
+                next_sort += args.sort_every
+            time.sleep(max(0.0, self.TICK - (time.time() - now)))
+        self.cpu = time.thread_time()
+
+
+# ==================== CHECKER ====================
+
+class Checker:
+    """
+    Bus subscriber comparing the tracker's running total per item with the
+    written one. The tracker nets the lines it reads together, so events
+    don't map 1:1 to writes: a pickup can arrive in two parts or merge with
+    the next one. What must hold is the totals - equal once caught up, and
+    never more picked up than was written (sorting must not add any).
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.latencies = LatencyHistogram()
+        self.matched = 0  # written changes the tracker has caught up with
+        self.events = 0
+        self.received = {}  # item_id -> running total from events
+        self.picked = {}  # item_id -> picked up according to events
+        self.maps = []
+
+    def __call__(self, events):
+        for event in events:
+            if isinstance(event, ft.MapEndEvent):
+                self.maps.append(event.map_number)
+                continue
+            self.events += 1
+            item_id = event.item_id
+            if isinstance(event, ft.DropEvent):
+                self.picked[item_id] = self.picked.get(item_id, 0) + event.count
+                total = self.received[item_id] = self.received.get(item_id, 0) + event.count
+            else:
+                total = self.received[item_id] = self.received.get(item_id, 0) - event.count
+            with self.writer.lock:
+                pending = self.writer.expected.get(item_id)
+                # Caught up with a written change: everything up to it is in
+                if pending and any(entry[1] == total for entry in pending):
+                    while True:
+                        written, written_total = pending.popleft()
+                        self.matched += 1
+                        if written_total == total:
+                            break
+                    self.latencies.add(max(0.0, event.ts - written[0]))
+
+    def outstanding(self):
+        with self.writer.lock:
+            return sum(1 for item_id, total in self.writer.written_total.items()
+                       if self.received.get(item_id, 0) != total)
+
+    def differences(self):
+        """(lost, extra, phantom): items short of / over the written total, items over-picked"""
+        with self.writer.lock:
+            written, picked = dict(self.writer.written_total), dict(self.writer.picked)
+        received = self.received
+        lost = [(i, t - received.get(i, 0)) for i, t in written.items() if received.get(i, 0) < t]
+        extra = [(i, received[i] - written.get(i, 0)) for i in received if received[i] > written.get(i, 0)]
+        phantom = [(i, n - picked.get(i, 0)) for i, n in self.picked.items() if n > picked.get(i, 0)]
+        return lost, extra, phantom
+
+
+# ==================== RUN ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="FurTorch soak test (Linux)")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load (default 60)")
+    parser.add_argument("--rate", type=float, default=20, help="steady pickups/consumptions per second")
+    parser.add_argument("--burst-size", type=int, default=200, help="extra pickups per burst (0 = none)")
+    parser.add_argument("--burst-every", type=float, default=30, help="seconds between bursts")
+    parser.add_argument("--map-every", type=float, default=20, help="seconds in the hideout between maps (0 = never)")
+    parser.add_argument("--map-length", type=float, default=60, help="seconds per map")
+    parser.add_argument("--sort-every", type=float, default=45, help="seconds between bag sorts (0 = never)")
+    parser.add_argument("--consume-ratio", type=float, default=0.15, help="share of changes that consume")
+    parser.add_argument("--noise", type=int, default=5, help="noise lines per change")
+    parser.add_argument("--split", type=float, default=0.05, help="chance a write leaves a half line")
+    parser.add_argument("--items", type=int, default=50, help="distinct items")
+    parser.add_argument("--sample", type=float, default=10, help="seconds between CPU/RSS samples")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="where the log, journal and drop_log go (default: temp dir)")
+    parser.add_argument("--report", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    item_db = ft.load_item_database()
+    item_ids = sorted(item_db, key=int)[:args.items]
+
+    report_path = os.path.abspath(args.report) if args.report else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="furtorch_soak_")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # drop_log.txt, journal/ and log_index/ land here
+    log_path = os.path.join(workdir, "UE_game.log")
+    open(log_path, "w").close()
+
+    settings = ft.default_settings()
+    settings.update({"log_discovery": "path", "log_path": log_path, "log_level": "WARNING"})
+    ft.setup_logging(settings)
+
+    failures = check_sequences(settings, item_db)
+    if failures:
+        print("❌ Recorded bag sequences:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"✓ {len(SORT_SEQUENCES)} recorded bag sequences, split frames")
+
+    engine = ft.TrackerEngine.from_settings(settings, item_db=item_db)
+    server = ft.StatsServer(engine, "127.0.0.1", 0, settings['server_rate'])
+    writer = LogWriter(log_path, item_ids, args)
+    checker = Checker(writer)
+    # block + a deep queue: the checker must see every event, and bus.stats() proves it did
+    subscription = engine.bus.subscribe(checker, types=(ft.DropEvent, ft.ConsumeEvent, ft.MapEndEvent),
+                                        maxsize=1 << 20, policy="block", batch=256, name="soak-checker")
+
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    engine.started.wait(10)  # first poll done: the writer's lines are all live
+
+    print(f"FurTorch soak test - {args.duration:.0f}s at {args.rate}/s "
+          f"(+{args.burst_size} every {args.burst_every}s), log: {log_path}")
+    samples = []
+    cpu0, wall0, rss0 = resource.getrusage(resource.RUSAGE_SELF), time.time(), rss_kb()
+    writer.start()
+    end = wall0 + args.duration
+    while time.time() < end:
+        time.sleep(min(args.sample, max(0.0, end - time.time())))
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        samples.append((time.time() - wall0, usage.ru_utime + usage.ru_stime, rss_kb()))
+        print(f"  {samples[-1][0]:7.0f}s  events {writer.events_written:>9}  matched {checker.matched:>9}  "
+              f"RSS {samples[-1][2] / 1024:7.1f} MB")
+    writer.stop()
+
+    # Let the tracker catch up with the tail (one poll plus dispatch)
+    drain_deadline = time.time() + 10
+    while checker.outstanding() and time.time() < drain_deadline:
+        time.sleep(0.1)
+    time.sleep(ft.TrackerEngine.POLL_INTERVAL * 2)  # anything extra would show up now
+    wall = time.time() - wall0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (usage.ru_utime + usage.ru_stime) - (cpu0.ru_utime + cpu0.ru_stime)
+
+    snap = engine.snapshot()
+    lost, extra, phantom = checker.differences()
+    engine.stop()
+    server_thread.join(timeout=5)
+    subscription.close()
+    ft.stop_logging()
+
+    # RSS growth: least-squares slope per hour, skipping the first quarter (warm-up)
+    growth = 0.0
+    steady = samples[len(samples) // 4:]
+    if len(steady) > 1:
+        ts = [s[0] for s in steady]
+        rs = [s[2] for s in steady]
+        mt, mr = sum(ts) / len(ts), sum(rs) / len(rs)
+        var = sum((t - mt) ** 2 for t in ts)
+        growth = sum((t - mt) * (r - mr) for t, r in zip(ts, rs)) / var * 3600 / 1024 if var else 0.0
+
+    report = {
+        "duration_s": round(wall, 1),
+        "events_written": writer.events_written,
+        "events_matched": checker.matched,
+        "events_received": checker.events,
+        "lost": len(lost),  # items, not events: deltas are netted per read
+        "double_counted": len(extra),
+        "phantom_pickups": len(phantom),
+        "sorts_written": writer.sorts_written,
+        "maps_written": writer.maps_written,
+        "maps_tracked": snap["map_count"],
+        "maps_ended": len(checker.maps),
+        "bus": subscription.stats(),
+        "events_per_s": round(checker.matched / args.duration, 1),
+        "log_mb": round(writer.bytes_written / 2 ** 20, 1),
+        "cpu_percent": round(100 * (cpu - writer.cpu) / wall, 1),  # tracker only, writer thread excluded
+        "rss_mb": {"start": round(rss0 / 1024, 1), "end": round(samples[-1][2] / 1024, 1) if samples else None,
+                   "max": round(max(s[2] for s in samples) / 1024, 1) if samples else None,
+                   "growth_per_hour": round(growth, 1)},
+        "latency_ms": {f"p{q * 100:g}": checker.latencies.percentile(q) for q in (0.5, 0.9, 0.99, 0.999)},
+    }
+    report["latency_ms"]["max"] = round(checker.latencies.max * 1000, 1)
+
+    failures = []
+    if lost:
+        failures.append(f"{len(lost)} items short of the written total, e.g. {lost[:3]}")
+    if extra:
+        failures.append(f"{len(extra)} items over the written total, e.g. {extra[:3]}")
+    if phantom:
+        failures.append(f"{len(phantom)} items with phantom pickups, e.g. {phantom[:3]}")
+    if any(count > writer.picked.get(item_id, 0) for item_id, count in snap["drops_total"].items()):
+        failures.append("engine drop totals exceed what was written")
+    if report["bus"]["dropped"]:
+        failures.append(f"{report['bus']['dropped']} events dropped by the bus")
+    if checker.maps != list(range(1, len(checker.maps) + 1)) or len(checker.maps) != writer.maps_written:
+        failures.append(f"maps: wrote {writer.maps_written}, tracked {checker.maps[:10]}...")
+    report["failures"] = failures
+
+    print(json.dumps(report, indent=4))
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    if failures:
+        print("❌ " + "; ".join(failures))
+        sys.exit(1)
+    print(f"✓ {checker.matched} changes ({writer.sorts_written} sorts), none lost, double-counted or phantom")
+
+
+if __name__ == "__main__":
+    main()